@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+
+# Granularity → pandas period frequency (None = the weeks themselves)
+GRANULARITIES = {"week": None, "month": "M", "quarter": "Q", "year": "Y"}
+
+FACT_COLUMNS = [
+    "Granularity", "Type", "Period", "Previous Period", "Region", "Compared Region",
+    "Sales", "Previous Sales", "Growth %", "Compared Sales", "Compared Growth %",
+    "Sales Gap", "Score", "Fact",
+]
+
+
+def _money(value):
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    if value >= 1e9:
+        return f"{sign}USD {value / 1e9:.2f} billion"
+    if value >= 1e6:
+        return f"{sign}USD {value / 1e6:.2f} million"
+    if value >= 1e3:
+        return f"{sign}USD {value / 1e3:.1f}k"
+    return f"{sign}USD {value:,.0f}"
+
+
+def _weekly_matrix(final_df: pd.DataFrame) -> pd.DataFrame:
+    df = final_df.copy()
+    df["Week"] = pd.to_datetime(df["Week"], errors="coerce")
+    df = df.dropna(subset=["Week", "Sales", "Region"])
+    return df.pivot_table(index="Week", columns="Region", values="Sales", aggfunc="sum").sort_index()
+
+
+def _to_periods(weekly: pd.DataFrame, granularity: str, complete_only: bool):
+    """Period × region sums (NaN where a region has no row) and the number of loaded weeks behind each."""
+    freq = GRANULARITIES[granularity]
+    present = weekly.notna()
+    if freq is None:
+        wide, weeks = weekly, present.astype(int)
+    else:
+        periods = weekly.index.to_period(freq)
+        wide = weekly.groupby(periods).sum(min_count=1)
+        weeks = present.groupby(periods).sum()
+
+    if freq is not None and complete_only and len(wide):
+        # A loaded week covers 7 days; edge periods count only if those days reach their bounds
+        if weekly.index.max() + pd.Timedelta(days=6) < wide.index[-1].end_time.normalize():
+            wide, weeks = wide.iloc[:-1], weeks.iloc[:-1]
+        if len(wide) and weekly.index.min() - pd.Timedelta(days=6) > wide.index[0].start_time:
+            wide, weeks = wide.iloc[1:], weeks.iloc[1:]
+    return wide, weeks
+
+
+def period_region_matrix(final_df: pd.DataFrame, granularity="quarter", complete_only=True):
+    """
+    Sales summed into a period × region matrix.
+
+    With `complete_only`, edge periods the data does not fully cover
+    (e.g. a quarter with only its first weeks loaded) are dropped so they
+    are not compared against full periods.
+
+    Returns:
+        pd.DataFrame: index = periods (oldest first), columns = regions;
+            NaN where a region has no rows in the period
+    """
+    return _to_periods(_weekly_matrix(final_df), granularity, complete_only)[0]
+
+
+def compare_regions(final_df: pd.DataFrame, granularities=("week", "month", "quarter", "year"),
+                    k=3, all_pairs=False, complete_only=True) -> pd.DataFrame:
+    """
+    Deterministic, ranked region-comparison facts for the latest period versus
+    the one before it, at each granularity.
+
+    Two kinds of facts are produced from the period × region matrix:
+      - "mover": a region's period-over-period change (top-K and bottom-K by growth)
+      - "pair": a region outperforming another, with the revenue gap and the
+        growth spread; pairs are the top-K vs bottom-K regions by growth, or
+        every region pair if `all_pairs`
+
+    Pair gaps and spreads are computed as R × R arrays in one step.
+
+    A region is only compared when it has rows for every week loaded in both
+    periods; a region missing some weeks is left out rather than reported as
+    a decline.
+
+    Returns:
+        pd.DataFrame: facts with FACT_COLUMNS, ordered by Score (largest first)
+            within each granularity; "Fact" holds a ready-to-narrate sentence
+    """
+    weekly = _weekly_matrix(final_df)
+    parts = []
+    for granularity in granularities:
+        wide, weeks = _to_periods(weekly, granularity, complete_only)
+        if len(wide) < 2 or wide.shape[1] == 0:
+            continue
+
+        # Weeks the region has vs weeks loaded for anyone, in both compared periods
+        last_two = weeks.iloc[-2:].to_numpy()
+        covered = (last_two == last_two.max(axis=1, keepdims=True)).all(axis=0)
+
+        regions = wide.columns.to_numpy()
+        current, previous = wide.iloc[-1].to_numpy(dtype=float), wide.iloc[-2].to_numpy(dtype=float)
+        period, prev_period = str(wide.index[-1]), str(wide.index[-2])
+        label = period
+        if granularity == "week":
+            period, prev_period = wide.index[-1].strftime("%Y-%m-%d"), wide.index[-2].strftime("%Y-%m-%d")
+            label = f"the week of {period}"
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            growth = np.where(covered & (previous != 0), (current - previous) / previous * 100, np.nan)
+
+        ranked = np.argsort(np.nan_to_num(growth, nan=-np.inf))[::-1]
+        valid = ranked[~np.isnan(growth[ranked])]
+        top, bottom = valid[:k], valid[::-1][:k]
+
+        # --- movers ---
+        movers = np.unique(np.concatenate([top, bottom]))
+        parts.append(pd.DataFrame({
+            "Granularity": granularity,
+            "Type": "mover",
+            "Period": period,
+            "Previous Period": prev_period,
+            "Region": regions[movers],
+            "Sales": current[movers],
+            "Previous Sales": previous[movers],
+            "Growth %": growth[movers],
+            "Score": np.abs(growth[movers]),
+            "Fact": [
+                f"Region {regions[i]}'s revenue {'increased' if growth[i] >= 0 else 'decreased'} "
+                f"{abs(growth[i]):.1f}% in {label} vs {prev_period} "
+                f"({_money(current[i])} vs {_money(previous[i])})."
+                for i in movers
+            ],
+        }))
+
+        # --- pairs: a outperforms b when it grew faster ---
+        a_idx, b_idx = (valid, valid) if all_pairs else (top, bottom)
+        spread = growth[a_idx][:, None] - growth[b_idx][None, :]
+        gap = current[a_idx][:, None] - current[b_idx][None, :]
+        ai, bi = np.nonzero((spread > 0) & (a_idx[:, None] != b_idx[None, :]))
+        a, b = a_idx[ai], b_idx[bi]
+        if len(a):
+            pair_spread, pair_gap = spread[ai, bi], gap[ai, bi]
+            parts.append(pd.DataFrame({
+                "Granularity": granularity,
+                "Type": "pair",
+                "Period": period,
+                "Previous Period": prev_period,
+                "Region": regions[a],
+                "Compared Region": regions[b],
+                "Sales": current[a],
+                "Previous Sales": previous[a],
+                "Growth %": growth[a],
+                "Compared Sales": current[b],
+                "Compared Growth %": growth[b],
+                "Sales Gap": pair_gap,
+                "Score": pair_spread,
+                "Fact": [
+                    f"Region {regions[i]}'s revenue {'increased' if growth[i] >= 0 else 'decreased'} "
+                    f"{abs(growth[i]):.1f}% in {label}, outperforming Region {regions[j]} "
+                    f"({growth[j]:+.1f}%) by {spread_ij:.1f} percentage points"
+                    + (f" and {_money(gap_ij)} in revenue." if gap_ij > 0 else
+                       f"; it still trails Region {regions[j]} by {_money(-gap_ij)} in revenue.")
+                    for i, j, spread_ij, gap_ij in zip(a, b, pair_spread, pair_gap)
+                ],
+            }))
+
+    if not parts:
+        return pd.DataFrame(columns=FACT_COLUMNS)
+
+    facts = pd.concat(parts, ignore_index=True).reindex(columns=FACT_COLUMNS)
+    order = {g: i for i, g in enumerate(granularities)}
+    facts["_order"] = facts["Granularity"].map(order)
+    facts = facts.sort_values(["_order", "Score"], ascending=[True, False]).drop(columns="_order")
+    return facts.reset_index(drop=True)
+
+
+def narrate_comparisons(facts: pd.DataFrame, per_granularity=4) -> str:
+    """
+    Fixed-size text block of the highest-scoring facts per granularity
+    (half movers, half pairs), ready to paste into the LLM prompt.
+    """
+    if facts.empty:
+        return "No period-over-period comparisons available."
+
+    half = max(per_granularity // 2, 1)
+    lines = []
+    for granularity, group in facts.groupby("Granularity", sort=False):
+        picked = pd.concat([
+            group[group["Type"] == "mover"].head(half),
+            group[group["Type"] == "pair"].head(per_granularity - half),
+        ])
+        lines.append(f"[{granularity.capitalize()}]")
+        lines.extend(f"- {fact}" for fact in picked["Fact"])
+    return "\n".join(lines)
@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
-from data_preprocessing import standardize_columns 
+from data_preprocessing import standardize_columns
 from overall_analysis import generate_insights 
-from dynamic_metrics import generate_time_series_region, compute_retail_metrics
+from dynamic_metrics import generate_time_series_region
+from forecasting import FORECAST_MODELS, forecast_regions
+from metrics_cache import MetricsCache, dataset_fingerprint
+from hierarchy import HierarchyCube
+from ingestion import ingest_files
+from data_quality import profile_uploads
+from scenarios import build_scenario_grid, run_scenarios
 
 # ==============================
 st.set_page_config(page_title="Data to Insight Agent", layout="wide")
@@ -37,6 +42,41 @@ def load_csv(path_or_file):
     return df
 
 
+@st.cache_data(show_spinner=False)
+def load_files(files, _progress_bar=None):
+    """
+    Load every sheet of the uploaded workbooks / files in parallel and
+    return one already-standardized DataFrame.
+    """
+    def report(done, total, label, rows):
+        if _progress_bar is not None:
+            _progress_bar.progress(done / total, text=f"Loaded {label} ({rows:,} rows) · {done}/{total}")
+
+    return ingest_files(files, progress=report)
+
+
+@st.cache_data(show_spinner=False)
+def validate_upload(files, all_sheets=False):
+    """Stream the uploaded files once and return the data-quality report (no LLM call)."""
+    return profile_uploads(files, all_sheets=all_sheets, fail_fast=False)
+
+
+def show_quality_report(report):
+    for message in report["errors"]:
+        st.error(message)
+    for message in report["warnings"]:
+        st.warning(message)
+    with st.expander("🧪 Data Quality Report", expanded=not report["ok"]):
+        st.caption(
+            f"{report['rows']:,} rows · {report['distinct_weeks']:,} distinct dates · "
+            f"{report['duplicate_keys']:,} repeated (Region, Week) keys"
+        )
+        st.dataframe(report["columns"], use_container_width=True, hide_index=True)
+        if len(report["gaps"]):
+            st.markdown("**Date coverage gaps**")
+            st.dataframe(report["gaps"], use_container_width=True, hide_index=True)
+
+
 @st.cache_data
 def preprocess_data(df):
     return standardize_columns(df)
@@ -45,9 +85,16 @@ def preprocess_data(df):
 def analyze_data(standardized_df):
     return generate_insights(standardized_df)
 
-@st.cache_data
-def time_series_analysis_all(filtered_df, start_date, end_date):
-    return compute_retail_metrics(filtered_df, start_date, end_date)
+@st.cache_resource
+def metrics_cache():
+    return MetricsCache()
+
+def time_series_analysis_all(standardized_df, dataset_key, start_date, end_date, regions=None):
+    return metrics_cache().get_metrics(standardized_df, dataset_key, start_date, end_date, regions)
+
+@st.cache_resource
+def hierarchy_cube(dataset_key, _standardized_df):
+    return HierarchyCube(_standardized_df)
 
 # @st.cache_data
 def time_series_analysis(filtered_region_df):
@@ -66,7 +113,10 @@ with left_col:
 
     col1, col2 = st.columns([2.2, 1])
     with col1:
-        uploaded_file = st.file_uploader("Upload your data file", type=["csv", "xlsx", "xls"])
+        uploaded_files = st.file_uploader(
+            "Upload your data file(s)", type=["csv", "xlsx", "xls"], accept_multiple_files=True
+        )
+        read_all_sheets = st.checkbox("Read all Excel sheets", value=False)
     with col2:
         st.caption("Or load sample data:")
         c1, c2 = st.columns(2)
@@ -85,26 +135,65 @@ with left_col:
     if "df" not in st.session_state:
         st.session_state.df = None
 
-    if uploaded_file is not None:
-        st.session_state.df = load_csv(uploaded_file)
+    if uploaded_files:
+        file_ids = ",".join(str(getattr(f, "file_id", f.name)) for f in uploaded_files)
+        all_sheets = len(uploaded_files) > 1 or read_all_sheets
+
+        # Validate before any LLM column mapping or metrics run
+        with st.spinner("Validating upload ......"):
+            report = validate_upload(uploaded_files, all_sheets)
+        show_quality_report(report)
+        if not report["ok"]:
+            st.session_state.df = None
+            st.stop()
+
+        if all_sheets:
+            progress_bar = st.progress(0.0, text="Reading sheets ......")
+            try:
+                st.session_state.df = load_files(uploaded_files, progress_bar)
+            except Exception as e:
+                st.session_state.df = None
+                st.error(f"Could not load the files: {e}")
+                st.stop()
+            finally:
+                progress_bar.empty()
+            st.session_state.standardized = True
+            st.session_state.dataset_source = f"upload:{file_ids}:all"
+        else:
+            st.session_state.df = load_csv(uploaded_files[0])
+            st.session_state.standardized = False
+            st.session_state.dataset_source = f"upload:{file_ids}"
         st.success("File uploaded successfully!")
     elif sample1:
         st.session_state.df = load_csv(sample_paths["walmart"])
+        st.session_state.standardized = False
+        st.session_state.dataset_source = sample_paths["walmart"]
         st.success("Loaded sample dataset: Walmart.csv")
     elif sample2:
         st.session_state.df = load_csv(sample_paths["retail"])
+        st.session_state.standardized = False
+        st.session_state.dataset_source = sample_paths["retail"]
         st.success("Loaded sample dataset: RetailData.csv")
 
 
 
     df = st.session_state.df
 
-    if df is not None:
+    if df is not None and st.session_state.get("standardized"):
+        standardized_df = df
+    elif df is not None:
         with st.spinner("Standardizing column names ......"):
             try:
                 standardized_df = preprocess_data(df)
             except Exception as e:
-                standardized_df = df  
+                st.error(f"Could not standardize the data: {e}")
+                st.stop()
+
+    if df is not None:
+        # Hash the dataset once per source; metric queries reuse the fingerprint
+        if st.session_state.get("dataset_key_source") != st.session_state.get("dataset_source"):
+            st.session_state.dataset_key = dataset_fingerprint(standardized_df)
+            st.session_state.dataset_key_source = st.session_state.get("dataset_source")
 
         st.subheader("📊 Standardized Data Preview")
         st.dataframe(standardized_df.head(3), use_container_width=True, hide_index=True)
@@ -147,19 +236,14 @@ with right_col:
 
         if run_overall:
             with st.spinner("Computing overall retail metrics..."):
-                df_all = standardized_df.copy()
-                df_all["Week"] = pd.to_datetime(df_all["Week"], errors="coerce")
-
-                filtered_df = df_all[
-                    (df_all["Week"] >= pd.to_datetime(start_date))
-                    & (df_all["Week"] <= pd.to_datetime(end_date))
-                ].sort_values("Week")
+                weeks_in_range = weeks[(weeks >= pd.to_datetime(start_date)) & (weeks <= pd.to_datetime(end_date))]
 
-                if filtered_df.empty:
+                if weeks_in_range.empty:
                     st.warning(f"No data found between {start_date} and {end_date}.")
                 else:
-
-                    st.session_state.summary_all = compute_retail_metrics(filtered_df)
+                    st.session_state.summary_all = time_series_analysis_all(
+                        standardized_df, st.session_state.dataset_key, start_date, end_date
+                    )
 
         if "summary_all" in st.session_state:
             summary_all, top3_df = st.session_state.summary_all
@@ -206,6 +290,17 @@ with right_col:
                 st.subheader("🏆 Top 3 Regions by Total Sales")
                 st.info("No region-level data available.")
 
+            # === Hierarchy Drill-Down (only when Store / Category levels exist) ===
+            cube = hierarchy_cube(st.session_state.dataset_key, standardized_df)
+            if len(cube.hierarchy) > 1:
+                st.subheader("🗂️ Hierarchy Drill-Down")
+                level = st.selectbox("Aggregate by:", cube.hierarchy)
+                st.dataframe(
+                    cube.level_metrics(level, start_date, end_date, top_n=10),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
         st.divider()
 
         # ----------- Step 2: -----------
@@ -238,3 +333,95 @@ with right_col:
                         st.markdown(f"**📅 Period:** {start_date} → {end_date}")
                         st.markdown(f"**💰 Total Sales:** ${summary_region['total_sales']:,.2f}")
                         st.markdown(f"**📊 Avg Weekly Sales:** ${summary_region['avg_sales']:,.2f}")
+
+        st.divider()
+
+        # ----------- Step 3: -----------
+        st.markdown("### Step 3: Sales Forecast")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            horizon = st.selectbox("Forecast Horizon (weeks):", [4, 13], index=1)
+        with col2:
+            forecast_model = st.selectbox("Model:", FORECAST_MODELS, index=1)
+
+        run_forecast = st.button("Run Forecast")
+
+        if run_forecast:
+            with st.spinner("Fitting forecast models for all regions..."):
+                df_forecast = standardized_df.copy()
+                df_forecast["Week"] = pd.to_datetime(df_forecast["Week"], errors="coerce")
+                df_forecast = df_forecast[df_forecast["Week"] <= pd.to_datetime(end_date)]
+
+                forecast_df, forecast_stats = forecast_regions(df_forecast, horizon=horizon, model=forecast_model)
+
+                if forecast_df.empty:
+                    st.warning("Not enough data to build a forecast.")
+                else:
+                    forecast_table = forecast_df.pivot(index="Week", columns="Region", values="Forecast")
+                    forecast_table.index = forecast_table.index.strftime("%Y-%m-%d")
+                    st.dataframe(forecast_table.round(2), use_container_width=True)
+                    st.caption(
+                        f"{forecast_stats['series']} regions · {forecast_stats['fitted']} fitted, "
+                        f"{forecast_stats['cached']} reused from cache · "
+                        f"fit {forecast_stats['fit_series_per_sec']:,.0f} series/s, "
+                        f"predict {forecast_stats['predict_series_per_sec']:,.0f} series/s"
+                    )
+
+        st.divider()
+
+        # ----------- Step 4: -----------
+        st.markdown("### Step 4: What-If Scenarios")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            holiday_uplift = st.slider("Holiday week uplift %", -30, 30, 10, step=5)
+            sales_change = st.slider("Overall sales change %", -30, 30, 0, step=5)
+        with col2:
+            fuel_change = st.slider("Fuel price change %", -30, 30, 15, step=5)
+            cpi_change = st.slider("CPI change %", -10, 10, 0, step=1)
+
+        run_whatif = st.button("Run Scenarios")
+
+        if run_whatif:
+            with st.spinner("Evaluating scenarios..."):
+                df_whatif = standardized_df.copy()
+                df_whatif["Week"] = pd.to_datetime(df_whatif["Week"], errors="coerce")
+                df_whatif = df_whatif[
+                    (df_whatif["Week"] >= pd.to_datetime(start_date))
+                    & (df_whatif["Week"] <= pd.to_datetime(end_date))
+                ]
+
+                custom = {
+                    "name": "Custom scenario",
+                    "holiday_uplift": holiday_uplift / 100,
+                    "sales_change": sales_change / 100,
+                    "fuel_price": fuel_change / 100,
+                    "cpi": cpi_change / 100,
+                }
+                # Sensitivity sweep around the custom scenario
+                sweep = build_scenario_grid(
+                    holiday_uplift=[x / 100 for x in range(0, 31, 5)],
+                    fuel_price=[x / 100 for x in range(-30, 31, 10)],
+                )
+                comparison, applied = run_scenarios(df_whatif, [custom] + sweep)
+
+                if comparison.empty:
+                    st.warning(f"No sales data found between {start_date} and {end_date}.")
+                else:
+                    # Growth columns are fractions; show them all as percentages
+                    percent_cols = [c for c in comparison.columns if c.endswith("%")]
+                    styled = lambda frame: frame.style.format(
+                        {c: "{:.2%}" for c in percent_cols}, na_rep="—"
+                    )
+                    st.dataframe(styled(comparison.head(2)), use_container_width=True, hide_index=True)
+                    sweep_rows = comparison.iloc[2:]
+                    with st.expander(f"Sensitivity: holiday uplift × fuel price ({len(sweep_rows)} scenarios)"):
+                        st.dataframe(styled(sweep_rows), use_container_width=True, hide_index=True)
+                    with st.expander("Elasticities applied"):
+                        st.caption(
+                            "Sales response per factor, from week-over-week changes. Region: the region's "
+                            "own significant estimate; pooled: the all-region estimate; none: no "
+                            "significant effect (0)."
+                        )
+                        st.dataframe(applied, use_container_width=True, hide_index=True)
@@ -1,38 +1,34 @@
-from dotenv import load_dotenv
-import os
-from ollama import Client
 import json
 import pandas as pd
+from llm_client import get_client
 
-load_dotenv()
-api_key = os.getenv("OLLAMA_API_KEY")
 
-client = Client(
-    host="https://ollama.com",
-    headers={"Authorization": f"Bearer {api_key}"}
-)
+target_fields = [
+    "Region", "Week", "Sales", "Holiday",
+    "temperature", "fuel_price", "cpi", "unemployment",
+    "Promotion_Flag", "Category"
+]
 
+# Header keywords the Week fallback (and upload validation) use to spot the date column
+WEEK_KEYWORDS = ["date", "week", "time", "period"]
 
-def standardize_columns(input: pd.DataFrame, retry=False, verbose=False) -> pd.DataFrame:
-    """
-    Use LLM (via Ollama) to automatically map dataset columns
-    to standardized target field names for easier downstream analysis.
-    Includes auto-retry safeguard if Region, Week, or Sales are missing.
-    Optional verbose mode for debugging.
-    """
-    df = input.copy()
+# Holiday spellings standardize_columns turns into 0 / 1 before `.astype(int)`
+HOLIDAY_VALUES = {True: 1, False: 0, "true": 1, "false": 0}
+
+# Column mappings that produced all required fields, keyed by the source column names
+_MAPPING_CACHE = {}
 
-    target_fields = [
-        "Region", "Week", "Sales", "Holiday",
-        "temperature", "fuel_price", "cpi", "unemployment",
-        "Promotion_Flag", "Category"
-    ]
 
+def infer_column_mapping(columns, verbose=False) -> dict:
+    """
+    Ask the LLM (via Ollama) to map the given source column names to the
+    standardized target fields. Returns the raw {target: source} mapping.
+    """
     prompt = f"""
     You are a data preprocessing assistant.
 
     Your task:
-    Given the dataset columns: {list(df.columns)},
+    Given the dataset columns: {list(columns)},
     map each target field from this list: {target_fields}
     to the most appropriate column name from the dataset.
 
@@ -70,7 +66,7 @@ def standardize_columns(input: pd.DataFrame, retry=False, verbose=False) -> pd.D
         print("Sending prompt to Ollama...")
         print("Prompt preview:\n", prompt[:500], "...\n")
 
-    for part in client.chat("gpt-oss:20b", messages=messages, stream=True):
+    for part in get_client().chat("gpt-oss:20b", messages=messages, stream=True):
         response_text += part["message"]["content"]
 
     if verbose:
@@ -84,6 +80,45 @@ def standardize_columns(input: pd.DataFrame, retry=False, verbose=False) -> pd.D
         print("Warning: model did not return valid JSON.")
         mapping = {}
 
+    return mapping
+
+
+def parse_week(values: pd.Series) -> pd.Series:
+    """Parse Week values as %d-%m-%Y, falling back to %Y-%m-%d; anything else becomes NaT."""
+    parsed = pd.to_datetime(values, format="%d-%m-%Y", errors="coerce")
+    mask = parsed.isna()
+    if mask.any():
+        parsed.loc[mask] = pd.to_datetime(values[mask], format="%Y-%m-%d", errors="coerce")
+    return parsed
+
+
+def get_column_mapping(columns, verbose=False) -> dict:
+    """Cached mapping for these source columns, asking the LLM only on a miss."""
+    key = tuple(map(str, columns))
+    if key not in _MAPPING_CACHE:
+        return infer_column_mapping(columns, verbose=verbose)
+    return _MAPPING_CACHE[key]
+
+
+def standardize_columns(input: pd.DataFrame, retry=False, verbose=False, mapping=None) -> pd.DataFrame:
+    """
+    Use LLM (via Ollama) to automatically map dataset columns
+    to standardized target field names for easier downstream analysis.
+    Includes auto-retry safeguard if Region, Week, or Sales are missing.
+    Optional verbose mode for debugging.
+
+    A known `mapping` (e.g. shared by every sheet of a workbook) can be
+    passed to skip the LLM call and the retry.
+    """
+    df = input.copy()
+    fixed_mapping = mapping is not None
+
+    if mapping is None:
+        mapping = (
+            infer_column_mapping(list(df.columns), verbose=verbose) if retry
+            else get_column_mapping(list(df.columns), verbose=verbose)
+        )
+
     valid_map = {k: v for k, v in mapping.items() if v and v in df.columns}
 
     # Handle multiple targets mapping to same source (e.g. Region & Store -> Store)
@@ -105,7 +140,7 @@ def standardize_columns(input: pd.DataFrame, retry=False, verbose=False) -> pd.D
     if "Week" not in df.columns:
         possible_date_cols = [
             col for col in df.columns
-            if any(x in col.lower() for x in ["date", "week", "time", "period","Week"])
+            if any(x in col.lower() for x in WEEK_KEYWORDS)
         ]
         if possible_date_cols:
             if verbose:
@@ -113,21 +148,13 @@ def standardize_columns(input: pd.DataFrame, retry=False, verbose=False) -> pd.D
             df.rename(columns={possible_date_cols[0]: "Week"}, inplace=True)
 
     if "Week" in df.columns:
-        df["Week_parsed"] = pd.to_datetime(df["Week"], format="%d-%m-%Y", errors="coerce")
-
-        mask = df["Week_parsed"].isna()
-        if mask.any():
-            df.loc[mask, "Week_parsed"] = pd.to_datetime(df.loc[mask, "Week"], format="%Y-%m-%d", errors="coerce")
-
-        df["Week"] = df["Week_parsed"].dt.strftime("%Y-%m-%d")
-        df.drop(columns=["Week_parsed"], inplace=True)
+        df["Week"] = parse_week(df["Week"]).dt.strftime("%Y-%m-%d")
 
     if "Holiday" in df.columns:
-        df["Holiday"] = df["Holiday"].replace(
-            {True: 1, False: 0, "true": 1, "false": 0}
-        ).astype(int)
+        df["Holiday"] = df["Holiday"].replace(HOLIDAY_VALUES).astype(int)
 
-    final_cols = [col for col in target_fields if col in df.columns]
+    # "Store" is only produced by the Region/Store special case, keep it for hierarchy rollups
+    final_cols = [col for col in target_fields + ["Store"] if col in df.columns]
     final_df = df[final_cols]
 
     print("\nFinal standardized columns:", final_df.columns.to_list())
@@ -135,10 +162,25 @@ def standardize_columns(input: pd.DataFrame, retry=False, verbose=False) -> pd.D
     required_fields = {"Region", "Week", "Sales"}
     missing = required_fields - set(final_df.columns)
 
-    if missing and not retry:
+    if missing and not retry and not fixed_mapping:
         print(f"Missing critical fields: {missing}. Retrying once...\n")
         return standardize_columns(input, retry=True, verbose=verbose)
     elif missing and retry:
         print(f"Retry failed. Still missing: {missing}. Please check column names manually.")
+    elif missing:
+        print(f"Provided mapping is missing critical fields: {missing}.")
+    else:
+        _MAPPING_CACHE[tuple(map(str, input.columns))] = mapping
 
     return final_df
+
+
+def resolve_column_mapping(columns, verbose=False):
+    """
+    Mapping for these source columns that yields Region, Week and Sales,
+    asking the LLM (with the usual retry) only if it is not cached yet.
+    Only the header is needed, so it can run before any rows are loaded.
+    Returns None when no usable mapping was found.
+    """
+    standardize_columns(pd.DataFrame(columns=list(columns)), verbose=verbose)
+    return _MAPPING_CACHE.get(tuple(map(str, columns)))
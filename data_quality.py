@@ -0,0 +1,363 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from data_preprocessing import HOLIDAY_VALUES, WEEK_KEYWORDS, parse_week
+from ingestion import EXCEL_EXTENSIONS, source_name
+
+
+# Header keywords used to find the key columns without any LLM call, in priority
+# order; roles are claimed in this order so "Weekly_Sales" is Sales, not Week.
+# Week uses the same keywords as standardize_columns' own Week fallback.
+ROLE_KEYWORDS = {
+    "Sales": ["weekly_sales", "total_sales", "sales", "revenue", "amount"],
+    "Holiday": ["holiday", "festival"],
+    "Week": WEEK_KEYWORDS,
+    "Region": ["region", "area", "zone", "territory", "state", "store", "location", "branch"],
+}
+
+REPORT_COLUMNS = ["Column", "Role", "Nulls", "Null %", "Min", "Max"]
+
+
+class DataQualityError(ValueError):
+    """Raised when an upload fails validation; `report` holds the full profile."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__("; ".join(report["errors"]))
+
+
+def _mostly_numeric(values: pd.Series, share=0.9) -> bool:
+    values = values.dropna()
+    return len(values) > 0 and pd.to_numeric(values, errors="coerce").notna().mean() >= share
+
+
+def guess_roles(columns, sample=None) -> dict:
+    """
+    {role: source column} for Region, Week, Sales and Holiday from header keywords.
+    With a `sample` of rows, a numeric column is preferred for Sales
+    (so "Revenue" beats "Sales_Channel" and "Amount" beats "Sales_Person").
+    """
+    columns = [str(c) for c in columns]
+    roles, claimed = {}, set()
+    for role, keywords in ROLE_KEYWORDS.items():
+        candidates = list(dict.fromkeys(
+            c for keyword in keywords for c in columns if c not in claimed and keyword in c.lower()
+        ))
+        if role == "Sales" and sample is not None:
+            candidates = [c for c in candidates if _mostly_numeric(sample[c])] or candidates
+        if candidates:
+            roles[role] = candidates[0]
+            claimed.add(candidates[0])
+    return roles
+
+
+class DataProfiler:
+    """
+    Single-pass data-quality profile built from chunks of raw rows.
+
+    State is bounded: counters and min / max per column, the set of distinct
+    dates, and one 64-bit hash per distinct (Region, Week) key (at most
+    `max_keys` of them; past that the duplicate check stops and says so).
+
+    Key columns are found from header keywords (`guess_roles`), so profiling
+    needs no LLM call.
+    """
+
+    def __init__(self, max_keys=5_000_000, max_examples=5):
+        self.max_keys = max_keys
+        self.max_examples = max_examples
+
+        self.rows = 0
+        self.nulls = pd.Series(dtype="int64")
+        self.roles = {}
+        self.ranges = {}
+        self.failures = {"Week": 0, "Sales": 0, "Holiday": 0}
+        self.examples = {"Week": [], "Sales": [], "Holiday": []}
+        self.non_binary_holidays = 0
+        self.negative_sales = 0
+        self.days = set()
+        self.duplicate_keys = 0
+        self.keys_truncated = False
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._chunk_roles = {}
+
+    def _roles_for(self, chunk):
+        key = tuple(chunk.columns)
+        if key in self._chunk_roles:
+            return self._chunk_roles[key]
+
+        roles = guess_roles(key, sample=chunk)
+        self._chunk_roles[key] = roles
+        for role, col in roles.items():
+            self.roles.setdefault(col, role)
+        return roles
+
+    def _range(self, col, values):
+        values = values.dropna()
+        if values.empty:
+            return
+        low, high = values.min(), values.max()
+        if col in self.ranges:
+            low, high = min(low, self.ranges[col][0]), max(high, self.ranges[col][1])
+        self.ranges[col] = (low, high)
+
+    def _fail(self, role, raw, bad):
+        self.failures[role] += int(bad.sum())
+        room = self.max_examples - len(self.examples[role])
+        if room > 0 and bad.any():
+            # Plain Python values, so the report reads ['abc', nan] rather than numpy reprs
+            values = [v.item() if isinstance(v, np.generic) else v for v in pd.unique(raw[bad])]
+            new = [v for v in values if v not in self.examples[role]]
+            self.examples[role].extend(new[:room])
+
+    def _track_keys(self, region, days):
+        if self.keys_truncated:
+            return
+        hashes = pd.util.hash_pandas_object(
+            pd.DataFrame({"Region": region.astype(str).to_numpy(), "Week": days}), index=False
+        ).to_numpy()
+        unique = np.unique(hashes)
+
+        # Repeats inside the chunk, plus first occurrences of keys already seen
+        pos = np.searchsorted(self._keys, unique).clip(max=max(len(self._keys) - 1, 0))
+        seen = (self._keys[pos] == unique) if len(self._keys) else np.zeros(len(unique), dtype=bool)
+        self.duplicate_keys += int(len(hashes) - len(unique) + seen.sum())
+
+        # Both sides are sorted, so the stable sort is a linear merge
+        self._keys = np.sort(np.concatenate([self._keys, unique[~seen]]), kind="stable")
+        if len(self._keys) > self.max_keys:
+            self.keys_truncated = True
+            self._keys = np.empty(0, dtype=np.uint64)
+
+    def update(self, chunk: pd.DataFrame):
+        """Fold one chunk of raw (not yet standardized) rows into the profile."""
+        chunk = chunk.rename(columns=str)
+        roles = self._roles_for(chunk)
+        self.rows += len(chunk)
+        self.nulls = self.nulls.add(chunk.isna().sum(), fill_value=0).astype("int64")
+
+        for col in chunk.columns:
+            if col not in roles.values() and pd.api.types.is_numeric_dtype(chunk[col]):
+                self._range(col, chunk[col])
+
+        week = None
+        if "Week" in roles:
+            raw = chunk[roles["Week"]]
+            week = parse_week(raw)
+            self._fail("Week", raw, week.isna() & raw.notna())
+            self._range(roles["Week"], week)
+            days = week.dropna().to_numpy().astype("datetime64[D]").astype(np.int64)
+            self.days.update(np.unique(days).tolist())
+
+        if "Sales" in roles:
+            raw = chunk[roles["Sales"]]
+            sales = pd.to_numeric(raw, errors="coerce")
+            self._fail("Sales", raw, sales.isna() & raw.notna())
+            self._range(roles["Sales"], sales)
+            self.negative_sales += int((sales < 0).sum())
+
+        if "Holiday" in roles:
+            # `.astype(int)` in standardize_columns raises on nulls and non-numeric values
+            raw = chunk[roles["Holiday"]]
+            holiday = pd.to_numeric(raw.replace(HOLIDAY_VALUES), errors="coerce")
+            self._fail("Holiday", raw, holiday.isna())
+            self.non_binary_holidays += int((holiday.notna() & ~holiday.isin([0, 1])).sum())
+            self._range(roles["Holiday"], holiday)
+
+        if week is not None and "Region" in roles:
+            region = chunk[roles["Region"]]
+            valid = week.notna() & region.notna()
+            self._track_keys(region[valid], week[valid].to_numpy().astype("datetime64[D]").astype(np.int64))
+
+    def coverage_gaps(self) -> pd.DataFrame:
+        """Runs of missing periods between loaded dates, at the data's usual spacing."""
+        days = np.array(sorted(self.days), dtype=np.int64)
+        columns = ["After", "Before", "Missing Periods"]
+        if len(days) < 3:
+            return pd.DataFrame(columns=columns)
+
+        step = np.diff(days)
+        cadence = int(np.median(step))
+        gap = step > cadence * 1.5
+        as_date = lambda d: pd.Timestamp(int(d), unit="D").strftime("%Y-%m-%d")
+        return pd.DataFrame({
+            "After": [as_date(d) for d in days[:-1][gap]],
+            "Before": [as_date(d) for d in days[1:][gap]],
+            "Missing Periods": np.rint(step[gap] / cadence).astype(int) - 1,
+        }, columns=columns)
+
+    def report(self, max_bad_rate=0.05) -> dict:
+        """
+        Profile summary with the errors that should stop the pipeline
+        and the warnings worth showing.
+
+        Errors: no rows, any Holiday value `.astype(int)` would crash on, or
+        more than `max_bad_rate` of the Week / Sales values failing to parse.
+        """
+        found = set(self.roles.values())
+        null_counts = {col: int(n) for col, n in self.nulls.items()}
+        columns = pd.DataFrame({
+            "Column": list(null_counts),
+            "Role": [self.roles.get(col, "") for col in null_counts],
+            "Nulls": list(null_counts.values()),
+            "Null %": [round(n / self.rows * 100, 2) if self.rows else 0.0 for n in null_counts.values()],
+            "Min": [self.ranges.get(col, (None, None))[0] for col in null_counts],
+            "Max": [self.ranges.get(col, (None, None))[1] for col in null_counts],
+        }, columns=REPORT_COLUMNS)
+
+        errors, warnings = [], []
+        if self.rows == 0:
+            errors.append("The file has no data rows.")
+
+        for role in ("Week", "Sales"):
+            if role not in found:
+                warnings.append(f"No {role} column recognized from the header; it was not validated.")
+                continue
+            col = next(c for c, r in self.roles.items() if r == role)
+            present = self.rows - null_counts.get(col, 0)
+            bad = self.failures[role]
+            message = (
+                f"{bad:,} of {present:,} {role} values in '{col}' could not be parsed"
+                f" (e.g. {self.examples[role]})."
+            )
+            if present and bad > max_bad_rate * present:
+                errors.append(message)
+            elif bad:
+                warnings.append(message)
+            elif present == 0 and self.rows:
+                errors.append(f"The {role} column '{col}' is empty.")
+
+        if self.failures["Holiday"]:
+            col = next(c for c, r in self.roles.items() if r == "Holiday")
+            errors.append(
+                f"{self.failures['Holiday']:,} Holiday values in '{col}' are empty or not 0 / 1 / true / false"
+                f" (e.g. {self.examples['Holiday']})."
+            )
+        if self.non_binary_holidays:
+            warnings.append(f"{self.non_binary_holidays:,} Holiday values are numbers other than 0 / 1.")
+        if self.negative_sales:
+            warnings.append(f"{self.negative_sales:,} Sales values are negative.")
+
+        gaps = self.coverage_gaps()
+        if len(gaps):
+            warnings.append(
+                f"{int(gaps['Missing Periods'].sum()):,} missing periods in {len(gaps):,} gaps of the date coverage."
+            )
+        if self.duplicate_keys:
+            warnings.append(
+                f"{self.duplicate_keys:,} rows repeat a (Region, Week) key; "
+                "expected only when the file has one row per Category / Store."
+            )
+        if self.keys_truncated:
+            warnings.append(f"More than {self.max_keys:,} distinct (Region, Week) keys; duplicate check stopped early.")
+
+        return {
+            "ok": not errors,
+            "rows": self.rows,
+            "roles": {role: col for col, role in self.roles.items()},
+            "columns": columns,
+            "failures": dict(self.failures),
+            "examples": {role: list(v) for role, v in self.examples.items()},
+            "first_week": pd.Timestamp(min(self.days), unit="D") if self.days else None,
+            "last_week": pd.Timestamp(max(self.days), unit="D") if self.days else None,
+            "distinct_weeks": len(self.days),
+            "gaps": gaps,
+            "duplicate_keys": self.duplicate_keys,
+            "errors": errors,
+            "warnings": warnings,
+        }
+
+
+def _without_trailing_blanks(rows):
+    """
+    Sheet rows minus the all-empty rows at the end, which read-only openpyxl
+    returns for cells that only carry formatting and pd.read_excel drops.
+    Only the length of the current blank run is held, not the rows.
+    """
+    blank_run, width = 0, 0
+    for row in rows:
+        if all(value is None for value in row):
+            blank_run += 1
+            width = len(row)
+            continue
+        for _ in range(blank_run):
+            yield (None,) * width
+        blank_run = 0
+        yield row
+
+
+def iter_chunks(source, chunksize=100_000, all_sheets=False):
+    """
+    Raw rows of a CSV or Excel file in DataFrames of at most `chunksize` rows.
+
+    CSVs and .xlsx sheets are streamed (openpyxl read-only mode), so only one
+    chunk is in memory at a time; legacy .xls sheets have no streaming reader
+    and are read whole, then sliced. Without `all_sheets` only the first sheet
+    is read, like pd.read_excel.
+    """
+    ext = os.path.splitext(source_name(source))[-1].lower()
+
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        book = load_workbook(source, read_only=True, data_only=True)
+        try:
+            for sheet in book.worksheets if all_sheets else book.worksheets[:1]:
+                rows = _without_trailing_blanks(sheet.iter_rows(values_only=True))
+                header = next(rows, None)
+                if header is None:
+                    continue
+                header = list(header)
+                while header and header[-1] is None:
+                    header.pop()
+                width = len(header)
+                while batch := [row[:width] for row in itertools.islice(rows, chunksize)]:
+                    yield pd.DataFrame(batch, columns=header)
+        finally:
+            book.close()
+    elif ext in EXCEL_EXTENSIONS:
+        sheets = pd.read_excel(source, sheet_name=None if all_sheets else 0)
+        for sheet in sheets.values() if all_sheets else [sheets]:
+            for start in range(0, len(sheet), chunksize):
+                yield sheet.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def profile_uploads(sources, all_sheets=False, chunksize=100_000,
+                    max_bad_rate=0.05, fail_fast=True) -> dict:
+    """
+    Validate and profile uploaded files in one streaming pass, before any
+    LLM column mapping or metrics run.
+
+    Key columns are found from each header's keywords, then every
+    chunk is checked for null rates, Week / Sales / Holiday values that would
+    fail standardization, date coverage gaps, duplicate (Region, Week) keys
+    and value ranges. Files are profiled together, so keys repeated across
+    files or sheets are caught too.
+
+    Input:
+        sources (list): file paths or uploaded file objects (.csv, .xls, .xlsx)
+        all_sheets (bool): profile every sheet of Excel workbooks
+        max_bad_rate (float): share of unparseable Week / Sales values tolerated
+        fail_fast (bool): raise DataQualityError when the profile has errors
+
+    Returns:
+        dict: the DataProfiler report ("ok", "errors", "warnings", "columns", "gaps", ...)
+    """
+    profiler = DataProfiler()
+    for source in sources:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        try:
+            for chunk in iter_chunks(source, chunksize=chunksize, all_sheets=all_sheets):
+                profiler.update(chunk)
+        finally:
+            if hasattr(source, "seek"):
+                source.seek(0)
+
+    report = profiler.report(max_bad_rate=max_bad_rate)
+    if fail_fast and not report["ok"]:
+        raise DataQualityError(report)
+    return report
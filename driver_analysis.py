@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+
+
+DRIVER_FACTORS = ["temperature", "fuel_price", "cpi", "unemployment", "Holiday"]
+
+
+def build_week_region_cube(final_df: pd.DataFrame, factors=None):
+    """
+    Pivot the standardized long table into a dense week × region cube
+    in a single pivot_table pass.
+
+    Sales are summed per (Week, Region); macro factors are averaged.
+
+    Returns:
+        weeks (pd.DatetimeIndex): sorted week index (axis 0)
+        regions (pd.Index): region labels (axis 1)
+        sales (np.ndarray): shape (W, R), NaN where a region has no row
+        cube (np.ndarray): shape (F, W, R) for the factors found in the frame
+        factors (list[str]): factor names in cube order
+    """
+    factors = [f for f in (factors or DRIVER_FACTORS) if f in final_df.columns]
+
+    df = final_df[["Week", "Region", "Sales"] + factors].copy()
+    df["Week"] = pd.to_datetime(df["Week"], errors="coerce")
+    for col in ["Sales"] + factors:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna(subset=["Week", "Region"])
+
+    aggfunc = {"Sales": "sum", **{f: "mean" for f in factors}}
+    wide = df.pivot_table(
+        index="Week", columns="Region", values=["Sales"] + factors,
+        aggfunc=aggfunc, sort=True,
+    )
+
+    weeks = wide.index
+    regions = wide["Sales"].columns
+    sales = wide["Sales"].to_numpy(dtype=float)
+    cube = np.stack(
+        [wide[f].reindex(columns=regions).to_numpy(dtype=float) for f in factors]
+    ) if factors else np.empty((0,) + sales.shape)
+
+    return weeks, regions, sales, cube, factors
+
+
+def masked_corr(x: np.ndarray, y: np.ndarray):
+    """
+    Pearson correlation along the week axis (axis -2), ignoring pairs where
+    either side is NaN. Broadcasts over any leading/trailing axes, so a
+    (F, W, R) factor cube against a (W, R) sales matrix yields (F, R).
+
+    Returns:
+        r (np.ndarray): correlation coefficients
+        p (np.ndarray): two-sided p-values
+        n (np.ndarray): number of paired observations
+    """
+    from scipy import stats
+
+    x, y = np.broadcast_arrays(x, y)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    n = mask.sum(axis=-2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.where(mask, x, 0.0).sum(axis=-2) / n
+        my = np.where(mask, y, 0.0).sum(axis=-2) / n
+        dx = np.where(mask, x - np.expand_dims(mx, -2), 0.0)
+        dy = np.where(mask, y - np.expand_dims(my, -2), 0.0)
+
+        cov = (dx * dy).sum(axis=-2)
+        r = cov / np.sqrt((dx * dx).sum(axis=-2) * (dy * dy).sum(axis=-2))
+        r = np.where(n >= 3, np.clip(r, -1.0, 1.0), np.nan)
+
+        dof = np.maximum(n - 2, 1)
+        t = r * np.sqrt(dof / (1.0 - r * r))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+        p = np.where(np.isnan(r), np.nan, p)
+
+    return r, p, n
+
+
+def _lagged(x: np.ndarray, y: np.ndarray, lag: int):
+    """Align factor x at week t - lag with sales y at week t."""
+    if lag == 0:
+        return x, y
+    return x[..., :-lag, :], y[lag:, :]
+
+
+def _holiday_uplift(sales: np.ndarray, holiday: np.ndarray):
+    """Mean holiday-week sales over mean non-holiday-week sales, minus 1, per column."""
+    valid = ~(np.isnan(sales) | np.isnan(holiday))
+    is_hol = valid & (np.nan_to_num(holiday) >= 0.5)
+    non_hol = valid & ~is_hol
+    s = np.nan_to_num(sales)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hol_mean = (s * is_hol).sum(axis=0) / is_hol.sum(axis=0)
+        non_mean = (s * non_hol).sum(axis=0) / non_hol.sum(axis=0)
+        return hol_mean / non_mean - 1
+
+
+def compute_driver_analysis(final_df: pd.DataFrame, lags=(0, 1, 2, 4), factors=None, changes=True):
+    """
+    Correlate weekly Sales with macro factors (temperature, fuel_price, cpi,
+    unemployment, Holiday) at several lags, per region and globally, and
+    compute holiday uplift. All regions and factors are evaluated together
+    as array operations over the week × region cube.
+
+    Global figures use total weekly sales against the cross-region mean of
+    each factor.
+
+    With `changes` (the default), week-over-week changes are correlated
+    rather than levels: cpi, fuel_price and unemployment trend over time, and
+    level correlations mostly measure that shared trend, not a sales response.
+
+    Input:
+        final_df (pd.DataFrame): standardized DataFrame with at least
+            ["Region", "Week", "Sales"] and any of the driver factor columns
+        lags (tuple[int]): factor lead in weeks (factor at t - lag vs sales at t)
+        changes (bool): correlate week-over-week changes instead of levels
+
+    Returns:
+        global_df (pd.DataFrame): one row per (Factor, Lag) with
+            ["Factor", "Lag", "Corr", "P-Value", "N"]
+        region_df (pd.DataFrame): one row per (Region, Factor, Lag) with
+            ["Region", "Factor", "Lag", "Corr", "P-Value", "N"]
+        uplift (dict): {"global": float, "by_region": pd.Series} holiday uplift,
+            or None when there is no Holiday column
+    """
+    weeks, regions, sales, cube, factors = build_week_region_cube(final_df, factors)
+
+    global_cols = ["Factor", "Lag", "Corr", "P-Value", "N"]
+    region_cols = ["Region"] + global_cols
+    if not factors or len(weeks) < 3:
+        return pd.DataFrame(columns=global_cols), pd.DataFrame(columns=region_cols), None
+
+    # Global series: total weekly sales vs average factor level across regions
+    with np.errstate(invalid="ignore"):
+        g_sales = np.where(np.isnan(sales).all(axis=1), np.nan, np.nansum(sales, axis=1))[:, None]
+        g_cube = np.nanmean(cube, axis=2, keepdims=True) if cube.size else cube
+
+    x, y, gx, gy = cube, sales, g_cube, g_sales
+    if changes:
+        x, y, gx, gy = np.diff(cube, axis=1), np.diff(sales, axis=0), np.diff(g_cube, axis=1), np.diff(g_sales, axis=0)
+
+    lags = [lag for lag in lags if 0 <= lag < y.shape[0] - 2]
+    region_parts, global_parts = [], []
+    F, R = len(factors), len(regions)
+
+    for lag in lags:
+        r, p, n = masked_corr(*_lagged(x, y, lag))
+        region_parts.append(pd.DataFrame({
+            "Region": np.tile(regions.to_numpy(), F),
+            "Factor": np.repeat(factors, R),
+            "Lag": lag,
+            "Corr": r.ravel(),
+            "P-Value": p.ravel(),
+            "N": n.ravel(),
+        }))
+
+        gr, gp, gn = masked_corr(*_lagged(gx, gy, lag))
+        global_parts.append(pd.DataFrame({
+            "Factor": factors,
+            "Lag": lag,
+            "Corr": gr[:, 0],
+            "P-Value": gp[:, 0],
+            "N": gn[:, 0],
+        }))
+
+    region_df = pd.concat(region_parts, ignore_index=True)[region_cols]
+    global_df = pd.concat(global_parts, ignore_index=True)[global_cols]
+
+    uplift = None
+    if "Holiday" in factors:
+        hol = cube[factors.index("Holiday")]
+        uplift = {
+            "global": float(_holiday_uplift(g_sales, np.nanmax(hol, axis=1, keepdims=True))[0]),
+            "by_region": pd.Series(_holiday_uplift(sales, hol), index=regions, name="Holiday Uplift %"),
+        }
+
+    return global_df, region_df, uplift
+
+
+def summarize_drivers(global_df: pd.DataFrame, region_df: pd.DataFrame, uplift=None,
+                      alpha=0.05, strong=0.5) -> str:
+    """
+    Condense driver analysis into a fixed-size text table for the LLM prompt:
+    one row per factor regardless of how many regions the dataset has.
+
+    For each factor, the lag with the strongest global correlation is kept,
+    alongside how many regions show a significant strong correlation at
+    that lag and which region is most affected.
+    """
+    if global_df.empty:
+        return "No macro factor columns available."
+
+    rows = []
+    for factor, g in global_df.groupby("Factor", sort=False):
+        best = g.loc[g["Corr"].abs().fillna(-1).idxmax()]
+        reg = region_df[(region_df["Factor"] == factor) & (region_df["Lag"] == best["Lag"])]
+        sig = reg[(reg["P-Value"] < alpha) & (reg["Corr"].abs() >= strong)]
+        top = reg.loc[reg["Corr"].abs().fillna(-1).idxmax()] if not reg.empty else None
+
+        rows.append({
+            "Factor": factor,
+            "Best Lag (wks)": int(best["Lag"]),
+            "Global Corr": round(best["Corr"], 3),
+            "Global P": round(best["P-Value"], 4),
+            "Median Region Corr": round(reg["Corr"].median(), 3),
+            "Strong Regions": f"{len(sig)}/{reg['Corr'].notna().sum()}",
+            "Most Affected Region": top["Region"] if top is not None else None,
+            "Its Corr": round(top["Corr"], 3) if top is not None else None,
+        })
+
+    table = pd.DataFrame(rows).to_string(index=False)
+
+    if uplift is not None:
+        by_region = uplift["by_region"].dropna().sort_values()
+        table += f"\n\nHoliday uplift (holiday vs non-holiday weekly sales): {uplift['global']:.1%} overall"
+        if not by_region.empty:
+            table += (
+                f"; highest Region {by_region.index[-1]} ({by_region.iloc[-1]:.1%}),"
+                f" lowest Region {by_region.index[0]} ({by_region.iloc[0]:.1%})"
+            )
+
+    return table
@@ -1,5 +1,3 @@
-from matplotlib.ticker import FuncFormatter
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 
@@ -19,6 +17,10 @@ def generate_time_series_region(filtered_region_df: pd.DataFrame):
         .sort_values("Week")
     )
 
+    # Matplotlib is only needed for plotting; keep it out of metrics-only imports
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+
     plt.style.use("default")
     fig, ax = plt.subplots(figsize=(8, 4))
 
@@ -71,12 +73,52 @@ def generate_time_series_region(filtered_region_df: pd.DataFrame):
     return fig, summary
 
 
-def compute_retail_metrics(filtered_df: pd.DataFrame):
+def weekly_region_aggregates(filtered_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse raw rows into a columnar (Week, Region) table holding the Sales
+    sum and the number of raw rows behind it. Every KPI in
+    `compute_retail_metrics` can be derived from this table, so it is what
+    gets cached and sliced instead of the raw frame.
+
+    Rows with a null Region are kept (as a null Region) so they still count
+    toward totals, growth and anomalies; only the top-3 table leaves them out.
+    """
     df = filtered_df.copy()
     df["Week"] = pd.to_datetime(df["Week"], errors="coerce")
-    df = df.dropna(subset=["Week", "Sales"]).sort_values("Week")
+    df = df.dropna(subset=["Week", "Sales"])
+    if "Region" not in df.columns:
+        df["Region"] = "All"
 
-    if df.empty:
+    return (
+        df.groupby(["Week", "Region"], as_index=False, sort=True, dropna=False)
+        .agg(Sales=("Sales", "sum"), Rows=("Sales", "size"))
+    )
+
+
+# (resample frequency, summary key, minimum weeks of history) for period growth
+GROWTH_PERIODS = [("M", "MoM Growth %", 8), ("Q", "QoQ Growth %", 24), ("Y", "YoY Growth %", 52)]
+
+
+def period_sales(weekly_sales: pd.Series, freq: str) -> pd.Series:
+    """Sum weekly totals into calendar periods ("M", "Q" or "Y")."""
+    return weekly_sales.resample(freq).sum()
+
+
+def _growth(period_totals: pd.Series):
+    if len(period_totals) < 2:
+        return np.nan
+    return (period_totals.iloc[-1] - period_totals.iloc[-2]) / period_totals.iloc[-2]
+
+
+def metrics_from_aggregates(agg: pd.DataFrame, period_totals=None):
+    """
+    Compute the retail KPIs from a `weekly_region_aggregates` table.
+
+    `period_totals` may supply precomputed {"M", "Q", "Y"} period sums for
+    the same rows (e.g. reused from a cache); missing ones are resampled
+    from the weekly totals.
+    """
+    if agg.empty:
         return (
             {
                 "Weeks Covered": 0,
@@ -91,97 +133,65 @@ def compute_retail_metrics(filtered_df: pd.DataFrame):
             pd.DataFrame(columns=["Region", "Total Sales", "Market Share %"]),
         )
 
-    start_date, end_date = df["Week"].min(), df["Week"].max()
+    period_totals = period_totals or {}
+    weekly = agg.groupby("Week")["Sales"].sum().sort_index()
+
+    start_date, end_date = weekly.index.min(), weekly.index.max()
     period_days = (end_date - start_date).days
     period_weeks = period_days // 7
-    total_sales = df["Sales"].sum()
-    avg_sales = df["Sales"].mean()
-
-    # === Week-over-Week Growth ===
-    if len(df) >= 2:
-        wow_growth = (df["Sales"].iloc[-1] - df["Sales"].iloc[-2]) / df["Sales"].iloc[-2]
-    else:
-        wow_growth = np.nan
-
-    # === Month-over-Month Growth ===
-    if period_weeks >= 8:
-        df_monthly = df.set_index("Week").resample("M")["Sales"].sum().reset_index()
-        mom_growth = (
-            (df_monthly["Sales"].iloc[-1] - df_monthly["Sales"].iloc[-2])
-            / df_monthly["Sales"].iloc[-2]
-            if len(df_monthly) >= 2
-            else np.nan
-        )
-    else:
-        mom_growth = np.nan
-
-    # === Quarter-over-Quarter Growth ===
-    if period_weeks >= 24:
-        df_quarterly = df.set_index("Week").resample("Q")["Sales"].sum().reset_index()
-        qoq_growth = (
-            (df_quarterly["Sales"].iloc[-1] - df_quarterly["Sales"].iloc[-2])
-            / df_quarterly["Sales"].iloc[-2]
-            if len(df_quarterly) >= 2
-            else np.nan
-        )
-    else:
-        qoq_growth = np.nan
-
-    # === Year-over-Year Growth ===
-    if period_weeks >= 52:
-        df_yearly = df.set_index("Week").resample("Y")["Sales"].sum().reset_index()
-        yoy_growth = (
-            (df_yearly["Sales"].iloc[-1] - df_yearly["Sales"].iloc[-2])
-            / df_yearly["Sales"].iloc[-2]
-            if len(df_yearly) >= 2
-            else np.nan
-        )
-    else:
-        yoy_growth = np.nan
+    total_sales = agg["Sales"].sum()
+    avg_sales = total_sales / agg["Rows"].sum()
+
+    # === Week-over-Week Growth (total sales of the last two weeks) ===
+    wow_growth = _growth(weekly)
+
+    # === Month / Quarter / Year-over-period Growth ===
+    growth = {}
+    for freq, _, min_weeks in GROWTH_PERIODS:
+        if period_weeks >= min_weeks:
+            totals = period_totals.get(freq)
+            if totals is None:
+                totals = period_sales(weekly, freq)
+            growth[freq] = _growth(totals)
+        else:
+            growth[freq] = np.nan
 
     # === simple anomaly detection：|Z-score| > 2 ===
-    agg_sales = df.groupby("Week", as_index=False)["Sales"].sum().sort_values("Week")
-    mean_sales = agg_sales["Sales"].mean()
-    std_sales = agg_sales["Sales"].std(ddof=0)
-
-    if std_sales > 0:
-        agg_sales["z_score"] = (agg_sales["Sales"] - mean_sales) / std_sales
-    else:
-        agg_sales["z_score"] = 0
-
-    anomaly_weeks = (
-        agg_sales.loc[agg_sales["z_score"].abs() > 2, "Week"]
-        .dt.strftime("%Y-%m-%d")
-        .tolist()
-    )
-    anomaly_weeks = sorted(list(set(anomaly_weeks)))
+    mean_sales = weekly.mean()
+    std_sales = weekly.std(ddof=0)
+    z_score = (weekly - mean_sales) / std_sales if std_sales > 0 else weekly * 0
+
+    anomaly_weeks = sorted(set(weekly.index[z_score.abs() > 2].strftime("%Y-%m-%d")))
 
-    
     summary = {
         "Weeks Covered": period_weeks,
         "Total Sales": total_sales,
         "Avg Weekly Sales": avg_sales,
         "WoW Growth %": wow_growth,
-        "MoM Growth %": mom_growth,
-        "QoQ Growth %": qoq_growth,
-        "YoY Growth %": yoy_growth,
+        "MoM Growth %": growth["M"],
+        "QoQ Growth %": growth["Q"],
+        "YoY Growth %": growth["Y"],
         "Anomaly Weeks": anomaly_weeks,
     }
 
     # ===  Top 3 Regions by Sales ===
-    if "Region" in df.columns:
-        region_sales = (
-            df.groupby("Region", as_index=False)["Sales"]
-            .sum()
-            .rename(columns={"Sales": "Total Sales"})
-        )
-        region_sales["Market Share %"] = (
-            region_sales["Total Sales"] / region_sales["Total Sales"].sum() * 100
-        )
-        top3_df = region_sales.sort_values("Total Sales", ascending=False).head(3)
-        top3_df["Total Sales"] = top3_df["Total Sales"].round(2)
-        top3_df["Market Share %"] = top3_df["Market Share %"].round(2)
-    else:
-        top3_df = pd.DataFrame(columns=["Region", "Total Sales", "Market Share %"])
+    region_sales = (
+        agg.groupby("Region", as_index=False)["Sales"]
+        .sum()
+        .rename(columns={"Sales": "Total Sales"})
+    )
+    region_sales["Market Share %"] = (
+        region_sales["Total Sales"] / region_sales["Total Sales"].sum() * 100
+    )
+    top3_df = region_sales.sort_values("Total Sales", ascending=False).head(3)
+    top3_df["Total Sales"] = top3_df["Total Sales"].round(2)
+    top3_df["Market Share %"] = top3_df["Market Share %"].round(2)
+
+    return summary, top3_df
 
+
+def compute_retail_metrics(filtered_df: pd.DataFrame):
+    summary, top3_df = metrics_from_aggregates(weekly_region_aggregates(filtered_df))
+    if "Region" not in filtered_df.columns:
+        top3_df = pd.DataFrame(columns=["Region", "Total Sales", "Market Share %"])
     return summary, top3_df
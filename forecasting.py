@@ -0,0 +1,312 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+SEASON_LENGTH = 52
+FORECAST_MODELS = ["seasonal_naive", "exp_smoothing", "ridge_lags"]
+
+# Fitted models kept per process, across all datasets and model types
+MODEL_CACHE_SIZE = 2048
+
+
+class ModelCache(OrderedDict):
+    """
+    Fitted models keyed by series hash; the least recently used go once
+    `max_entries` is exceeded. Reads and writes hold a lock, since the
+    process-wide instance is shared by concurrent dashboard sessions.
+    """
+
+    def __init__(self, max_entries=MODEL_CACHE_SIZE):
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if not super().__contains__(key):
+                return default
+            self.move_to_end(key)
+            return super().__getitem__(key)
+
+    def __getitem__(self, key):
+        with self._lock:
+            self.move_to_end(key)
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.max_entries:
+                self.popitem(last=False)
+
+
+_MODEL_CACHE = ModelCache()
+
+
+class SeasonalNaive:
+    """Repeat the value from the same week one season ago (last value if history is shorter)."""
+
+    name = "seasonal_naive"
+
+    def __init__(self, season_length=SEASON_LENGTH):
+        self.season_length = season_length
+
+    def fit(self, y: np.ndarray, holiday: np.ndarray):
+        m = self.season_length if len(y) >= self.season_length else 1
+        self.last_season_ = y[-m:].copy()
+        return self
+
+    def predict(self, horizon: int) -> np.ndarray:
+        m = len(self.last_season_)
+        return self.last_season_[np.arange(horizon) % m]
+
+
+class ExponentialSmoothing:
+    """
+    Additive Holt-Winters (level + trend + weekly-of-year seasonality).
+    Falls back to Holt's linear trend when there are fewer than two seasons.
+    Smoothing parameters are chosen from a small grid by one-step-ahead SSE;
+    the whole grid is run as one vectorized recursion.
+    """
+
+    name = "exp_smoothing"
+    alphas = (0.1, 0.3, 0.5, 0.8)
+    betas = (0.0, 0.05)
+    gammas = (0.05, 0.2)
+
+    def __init__(self, season_length=SEASON_LENGTH):
+        self.season_length = season_length
+
+    def fit(self, y: np.ndarray, holiday: np.ndarray):
+        m = self.season_length
+        seasonal = len(y) >= 2 * m
+        gammas = self.gammas if seasonal else (0.0,)
+
+        grid = np.array(np.meshgrid(self.alphas, self.betas, gammas, indexing="ij")).reshape(3, -1)
+        a, b, g = grid
+        k = grid.shape[1]
+
+        if seasonal:
+            level = np.full(k, y[:m].mean())
+            trend = np.full(k, (y[m:2 * m].mean() - y[:m].mean()) / m)
+            season = np.tile(y[:m] - y[:m].mean(), (k, 1))
+        else:
+            m = 1
+            level = np.full(k, y[0])
+            trend = np.full(k, y[1] - y[0] if len(y) > 1 else 0.0)
+            season = np.zeros((k, 1))
+
+        sse = np.zeros(k)
+        for t in range(len(y)):
+            s = season[:, t % m]
+            err = y[t] - (level + trend + s)
+            sse += err * err
+            new_level = a * (y[t] - s) + (1 - a) * (level + trend)
+            trend = b * (new_level - level) + (1 - b) * trend
+            season[:, t % m] = g * (y[t] - new_level) + (1 - g) * s
+            level = new_level
+
+        best = int(np.argmin(sse))
+        self.params_ = tuple(grid[:, best])
+        self.level_, self.trend_ = level[best], trend[best]
+        self.season_ = season[best]
+        self.next_pos_ = len(y) % m
+        return self
+
+    def predict(self, horizon: int) -> np.ndarray:
+        steps = np.arange(1, horizon + 1)
+        m = len(self.season_)
+        return self.level_ + steps * self.trend_ + self.season_[(self.next_pos_ + steps - 1) % m]
+
+
+class RidgeLags:
+    """
+    scikit-learn Ridge regression on lagged sales, the holiday flag and
+    week-of-year terms. Multi-step forecasts are produced recursively; future
+    holiday flags are taken from the same week one season earlier.
+    """
+
+    name = "ridge_lags"
+    lags = (1, 2, 4, SEASON_LENGTH)
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+
+    def _features(self, y, holiday, t, lags):
+        phase = 2 * np.pi * (t % SEASON_LENGTH) / SEASON_LENGTH
+        return [y[t - lag] for lag in lags] + [holiday[t], np.sin(phase), np.cos(phase)]
+
+    def fit(self, y: np.ndarray, holiday: np.ndarray):
+        from sklearn.linear_model import Ridge
+
+        self.lags_ = tuple(lag for lag in self.lags if lag <= len(y) // 2) or (1,)
+        start = max(self.lags_)
+
+        if len(y) - start < 3:
+            self.model_ = None
+            self.history_, self.holiday_ = y.copy(), holiday.copy()
+            return self
+
+        # Sales lags and target are scaled by mean level so one alpha suits every store size
+        self.scale_ = max(np.abs(y).mean(), 1.0)
+        self.denom_ = np.r_[np.full(len(self.lags_), self.scale_), 1.0, 1.0, 1.0]
+        X = np.array([self._features(y, holiday, t, self.lags_) for t in range(start, len(y))])
+        self.model_ = Ridge(alpha=self.alpha).fit(X / self.denom_, y[start:] / self.scale_)
+        self.history_, self.holiday_ = y.copy(), holiday.copy()
+        return self
+
+    def predict(self, horizon: int) -> np.ndarray:
+        if self.model_ is None:
+            return np.repeat(self.history_[-1], horizon)
+
+        y = np.concatenate([self.history_, np.zeros(horizon)])
+        n = len(self.history_)
+        future_hol = [
+            self.holiday_[n + h - SEASON_LENGTH] if n + h >= SEASON_LENGTH else 0.0
+            for h in range(horizon)
+        ]
+        holiday = np.concatenate([self.holiday_, future_hol])
+
+        # Ridge is linear, so apply coef_ directly instead of a per-step predict() call
+        for t in range(n, n + horizon):
+            x = np.array(self._features(y, holiday, t, self.lags_)) / self.denom_
+            y[t] = (x @ self.model_.coef_ + self.model_.intercept_) * self.scale_
+        return y[n:]
+
+
+_MODEL_CLASSES = {cls.name: cls for cls in (SeasonalNaive, ExponentialSmoothing, RidgeLags)}
+
+
+def build_weekly_series(filtered_df: pd.DataFrame):
+    """
+    Build the per-region weekly Sales series used by
+    `generate_time_series_region` (sum of Sales per Week and Region),
+    regularised to a 7-day grid with gaps interpolated.
+
+    Returns:
+        series (dict): {region: (weeks DatetimeIndex, sales ndarray, holiday ndarray)}
+    """
+    df = filtered_df.copy()
+    df["Week"] = pd.to_datetime(df["Week"], errors="coerce")
+    df = df.dropna(subset=["Week", "Sales"])
+    if "Holiday" not in df.columns:
+        df["Holiday"] = 0
+
+    weekly = (
+        df.groupby(["Region", "Week"], sort=True)
+        .agg(Sales=("Sales", "sum"), Holiday=("Holiday", "max"))
+        .reset_index()
+    )
+
+    region_codes, regions = pd.factorize(weekly["Region"])
+    bounds = np.flatnonzero(np.diff(region_codes)) + 1
+    week_ns = weekly["Week"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    sales = weekly["Sales"].to_numpy(dtype=float)
+    holiday = weekly["Holiday"].fillna(0).to_numpy(dtype=float)
+    one_week = pd.Timedelta(days=7).value
+
+    series = {}
+    for region, w, y, h in zip(regions, np.split(week_ns, bounds), np.split(sales, bounds), np.split(holiday, bounds)):
+        # Same result as asfreq("7D") + interpolate, without per-region pandas overhead
+        grid = w[0] + one_week * np.arange((w[-1] - w[0]) // one_week + 1)
+        if len(grid) != len(w) or (grid != w).any():
+            pos = np.searchsorted(w, grid)
+            hit = (pos < len(w)) & (w[np.minimum(pos, len(w) - 1)] == grid)
+            y = np.interp(grid, w, y)
+            h = np.where(hit, h[np.minimum(pos, len(w) - 1)], 0.0)
+        series[region] = (pd.DatetimeIndex(grid), y, h)
+    return series
+
+
+def series_hash(model_name: str, weeks: pd.DatetimeIndex, y: np.ndarray, holiday: np.ndarray) -> str:
+    """Content hash identifying a fitted model: model name + dates + values."""
+    h = hashlib.sha1(model_name.encode())
+    h.update(weeks.asi8.tobytes())
+    h.update(np.ascontiguousarray(y, dtype=float).tobytes())
+    h.update(np.ascontiguousarray(holiday, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _fit_batch(model_name: str, batch):
+    """Fit one model per (key, y, holiday) item. Runs inside a worker process."""
+    cls = _MODEL_CLASSES[model_name]
+    return [(key, cls().fit(y, holiday)) for key, y, holiday in batch]
+
+
+def forecast_regions(final_df: pd.DataFrame, horizon=13, model="exp_smoothing",
+                     n_jobs=-1, batch_size=64, cache=None):
+    """
+    Forecast the next `horizon` weeks of Sales for every region.
+
+    Models for regions whose series changed (or were never seen) are fitted
+    in parallel worker processes via joblib; models for unchanged series are
+    reused from `cache` (a dict keyed by `series_hash`, defaulting to a
+    process-wide ModelCache of the MODEL_CACHE_SIZE most recently used models).
+
+    Input:
+        final_df (pd.DataFrame): standardized DataFrame with ["Region", "Week", "Sales"]
+            and optionally "Holiday"
+        horizon (int): number of weeks to forecast (e.g. 4 or 13)
+        model (str): one of FORECAST_MODELS
+        n_jobs (int): joblib worker count (-1 = all cores, 1 = in-process)
+
+    Returns:
+        forecast_df (pd.DataFrame): ["Region", "Week", "Forecast", "Model"]
+        stats (dict): series counts, cache hits and fit/predict throughput
+            in series per second
+    """
+    if model not in _MODEL_CLASSES:
+        raise ValueError(f"Unknown forecast model '{model}'. Choose from {FORECAST_MODELS}.")
+
+    cache = _MODEL_CACHE if cache is None else cache
+    series = build_weekly_series(final_df)
+
+    keys = {region: series_hash(model, *s) for region, s in series.items()}
+    # One get() per key, so an entry evicted by another session between check and read is just a miss
+    models = {key: fitted for key in keys.values() if (fitted := cache.get(key)) is not None}
+    to_fit = [(keys[r], s[1], s[2]) for r, s in series.items() if keys[r] not in models]
+
+    start = time.perf_counter()
+    if to_fit:
+        batches = [to_fit[i:i + batch_size] for i in range(0, len(to_fit), batch_size)]
+        if n_jobs == 1 or len(batches) == 1:
+            results = [_fit_batch(model, b) for b in batches]
+        else:
+            from joblib import Parallel, delayed
+
+            results = Parallel(n_jobs=n_jobs)(delayed(_fit_batch)(model, b) for b in batches)
+        for batch in results:
+            for key, fitted in batch:
+                models[key] = cache[key] = fitted
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    regions = list(series)
+    forecasts = [models[keys[r]].predict(horizon) for r in regions]
+    predict_seconds = time.perf_counter() - start
+
+    last_weeks = pd.DatetimeIndex([series[r][0][-1] for r in regions])
+    steps = pd.to_timedelta(7 * np.arange(1, horizon + 1), unit="D")
+    forecast_df = pd.DataFrame({
+        "Region": np.repeat(regions, horizon),
+        "Week": (last_weeks.to_numpy()[:, None] + steps.to_numpy()[None, :]).ravel(),
+        "Forecast": np.concatenate(forecasts) if forecasts else np.array([]),
+        "Model": model,
+    })
+
+    n_series, n_fitted = len(series), len(to_fit)
+    stats = {
+        "series": n_series,
+        "fitted": n_fitted,
+        "cached": n_series - n_fitted,
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "fit_series_per_sec": n_fitted / fit_seconds if n_fitted and fit_seconds > 0 else np.nan,
+        "predict_series_per_sec": n_series / predict_seconds if n_series and predict_seconds > 0 else np.nan,
+    }
+    return forecast_df, stats
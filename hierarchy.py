@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+from dynamic_metrics import GROWTH_PERIODS
+
+
+# Coarsest → finest; levels not present in the data are skipped
+DEFAULT_HIERARCHY = ["Category", "Region", "Store"]
+TOTAL_LEVEL = "Total"
+
+# Node for rows with no value at a level, so every level still adds up to the total
+MISSING_NODE = "(missing)"
+
+
+class HierarchyCube:
+    """
+    Materialized Sales aggregates for every level of a rollup hierarchy
+    (e.g. Category → Region → Store, plus the grand total), per Week.
+
+    Raw rows are grouped exactly once, at the finest grain; each coarser
+    level is then summed from that much smaller table, which is the pandas
+    equivalent of a single ROLLUP / GROUPING SETS pass. Drill-down, roll-up
+    and per-level metrics are all served from the materialized levels.
+
+    Only rows without a valid Week or Sales are dropped; a row with no value
+    for a level is counted under a MISSING_NODE node at that level.
+    """
+
+    def __init__(self, final_df: pd.DataFrame, hierarchy=None):
+        hierarchy = hierarchy or DEFAULT_HIERARCHY
+        self.hierarchy = [level for level in hierarchy if level in final_df.columns]
+
+        df = final_df.copy()
+        df["Week"] = pd.to_datetime(df["Week"], errors="coerce")
+        df = df.dropna(subset=["Week", "Sales"])
+        for level in self.hierarchy:
+            if df[level].isna().any():
+                df[level] = df[level].astype(object).where(df[level].notna(), MISSING_NODE)
+
+        # sort=False throughout: a level holding MISSING_NODE mixes labels that do not compare
+        base = (
+            df.groupby(self.hierarchy + ["Week"], as_index=False, sort=False)
+            .agg(Sales=("Sales", "sum"), Rows=("Sales", "size"))
+        )
+
+        self.levels = {TOTAL_LEVEL: base.groupby("Week", as_index=False)[["Sales", "Rows"]].sum()}
+        for depth, level in enumerate(self.hierarchy):
+            keys = self.hierarchy[:depth + 1]
+            self.levels[level] = (
+                base if depth == len(self.hierarchy) - 1
+                else base.groupby(keys + ["Week"], as_index=False, sort=False)[["Sales", "Rows"]].sum()
+            )
+
+    @property
+    def level_names(self):
+        return [TOTAL_LEVEL] + self.hierarchy
+
+    def keys(self, level):
+        """Grouping columns that identify a node at `level`."""
+        if level == TOTAL_LEVEL:
+            return []
+        return self.hierarchy[:self.hierarchy.index(level) + 1]
+
+    def parent_level(self, level):
+        if level == TOTAL_LEVEL:
+            return None
+        depth = self.hierarchy.index(level)
+        return self.hierarchy[depth - 1] if depth > 0 else TOTAL_LEVEL
+
+    def child_level(self, level):
+        depth = -1 if level == TOTAL_LEVEL else self.hierarchy.index(level)
+        return self.hierarchy[depth + 1] if depth + 1 < len(self.hierarchy) else None
+
+    def rollup(self, level, start_date=None, end_date=None, path=None):
+        """
+        Weekly Sales at `level`, optionally limited to a date range and to the
+        descendants of `path` (e.g. {"Category": "Food", "Region": 4}).
+        """
+        if level not in self.levels:
+            raise ValueError(f"Unknown level '{level}'. Choose from {self.level_names}.")
+
+        table = self.levels[level]
+        mask = np.ones(len(table), dtype=bool)
+        if start_date is not None:
+            mask &= (table["Week"] >= pd.to_datetime(start_date)).to_numpy()
+        if end_date is not None:
+            mask &= (table["Week"] <= pd.to_datetime(end_date)).to_numpy()
+        for col, value in (path or {}).items():
+            if col not in self.keys(level):
+                raise ValueError(f"'{col}' is not above '{level}' in hierarchy {self.hierarchy}.")
+            mask &= (table[col] == value).to_numpy()
+        return table[mask]
+
+    def drill_down(self, level, node=None, **kwargs):
+        """Metrics for the children of `node` (a {column: value} path at `level`)."""
+        child = self.child_level(level)
+        if child is None:
+            raise ValueError(f"'{level}' is the finest level of hierarchy {self.hierarchy}.")
+        return self.level_metrics(child, path=node, **kwargs)
+
+    def roll_up(self, level, node=None, **kwargs):
+        """Metrics for the parent level, restricted to the ancestors of `node`."""
+        parent = self.parent_level(level)
+        if parent is None:
+            raise ValueError("Already at the total level.")
+        path = {k: v for k, v in (node or {}).items() if k in self.keys(parent)}
+        return self.level_metrics(parent, path=path, **kwargs)
+
+    def level_metrics(self, level, start_date=None, end_date=None, path=None, top_n=None):
+        """
+        Total Sales, Market Share %, Avg Weekly Sales and WoW/MoM/QoQ/YoY growth
+        for every node at `level`, ranked by Total Sales. All nodes are computed
+        together on a Week × node matrix.
+
+        Returns:
+            pd.DataFrame: one row per node (key columns + metrics), top `top_n` if given
+        """
+        table = self.rollup(level, start_date, end_date, path)
+        keys = self.keys(level)
+        metric_cols = ["Total Sales", "Market Share %", "Avg Weekly Sales", "WoW Growth %"] + [
+            name for _, name, _ in GROWTH_PERIODS
+        ]
+        if table.empty:
+            return pd.DataFrame(columns=keys + metric_cols)
+
+        node_ids = keys or [TOTAL_LEVEL]
+        if not keys:
+            table = table.assign(**{TOTAL_LEVEL: TOTAL_LEVEL})
+        wide = table.pivot_table(index="Week", columns=node_ids, values="Sales", aggfunc="sum", sort=False).sort_index()
+        rows = table.groupby(node_ids, sort=False)["Rows"].sum().reindex(wide.columns)
+
+        totals = wide.sum()
+        present = wide.notna()
+        first_week, last_week = present.idxmax(), present[::-1].idxmax()
+        period_weeks = (last_week - first_week).dt.days // 7
+
+        result = pd.DataFrame({
+            "Total Sales": totals,
+            "Market Share %": totals / totals.sum() * 100,
+            "Avg Weekly Sales": totals / rows,
+            "WoW Growth %": _last_growth(wide),
+        })
+        for freq, name, min_weeks in GROWTH_PERIODS:
+            periods = _span_fill(wide.resample(freq).sum(min_count=1))
+            result[name] = _last_growth(periods).where(period_weeks >= min_weeks)
+
+        result = result.sort_values("Total Sales", ascending=False).reset_index()
+        if not keys:
+            result = result.drop(columns=TOTAL_LEVEL)
+        result["Total Sales"] = result["Total Sales"].round(2)
+        result["Market Share %"] = result["Market Share %"].round(2)
+
+        return result.head(top_n) if top_n else result
+
+
+def _span_fill(wide: pd.DataFrame) -> pd.DataFrame:
+    """Zero-fill empty periods between each column's first and last observation."""
+    seen = wide.notna()
+    inside = seen.cummax() & seen[::-1].cummax()[::-1]
+    return wide.where(~inside, wide.fillna(0))
+
+
+def _last_growth(wide: pd.DataFrame) -> pd.Series:
+    """
+    Growth of each column's last observed period over its previous observed
+    period (NaN gaps are skipped, matching a per-node groupby).
+    """
+    values = wide.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    order = np.cumsum(valid, axis=0)
+    count = order[-1]
+
+    rows = np.arange(len(values))[:, None]
+    last = np.where(valid & (order == count), rows, -1).max(axis=0)
+    prev = np.where(valid & (order == count - 1), rows, -1).max(axis=0)
+
+    cols = np.arange(values.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth = (values[last, cols] - values[prev, cols]) / values[prev, cols]
+    return pd.Series(np.where(count >= 2, growth, np.nan), index=wide.columns)
@@ -0,0 +1,116 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from data_preprocessing import resolve_column_mapping, standardize_columns
+
+
+EXCEL_EXTENSIONS = (".xls", ".xlsx")
+
+
+def excel_engine():
+    """Use the Rust-based calamine reader when installed, otherwise pandas' default."""
+    return "calamine" if importlib.util.find_spec("python_calamine") else None
+
+
+def source_name(source):
+    """File name of a path or uploaded file object."""
+    return source.name if hasattr(source, "name") else str(source)
+
+
+def _materialize(sources, tmp_dir):
+    """Write uploaded file objects to `tmp_dir` so worker processes can open them by path."""
+    paths = []
+    for i, source in enumerate(sources):
+        if isinstance(source, (str, os.PathLike)):
+            paths.append(str(source))
+            continue
+        path = os.path.join(tmp_dir, f"{i}_{os.path.basename(source_name(source))}")
+        source.seek(0)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(source, f)
+        paths.append(path)
+    return paths
+
+
+def _read_raw(path, sheet=None, nrows=None, engine=None):
+    if os.path.splitext(path)[-1].lower() in EXCEL_EXTENSIONS:
+        return pd.read_excel(path, sheet_name=sheet, nrows=nrows, engine=engine)
+    return pd.read_csv(path, nrows=nrows)
+
+
+def _read_part(path, sheet, engine, mapping):
+    """Read one sheet / file and standardize it with a known mapping. Runs in a worker process."""
+    return standardize_columns(_read_raw(path, sheet, engine=engine), mapping=mapping)
+
+
+def list_parts(paths, engine=None):
+    """(path, sheet) for every sheet of every Excel file, and (path, None) for CSVs."""
+    parts = []
+    for path in paths:
+        if os.path.splitext(path)[-1].lower() in EXCEL_EXTENSIONS:
+            with pd.ExcelFile(path, engine=engine) as book:
+                parts.extend((path, sheet) for sheet in book.sheet_names)
+        else:
+            parts.append((path, None))
+    return parts
+
+
+def ingest_files(sources, max_workers=None, progress=None, verbose=False) -> pd.DataFrame:
+    """
+    Load every sheet of every given Excel workbook (and any CSVs) in parallel
+    worker processes and return one standardized DataFrame.
+
+    Headers are read first so the LLM column mapping is resolved once per
+    distinct header (normally once in total) before any rows are parsed; each
+    worker then reads and standardizes its part with that cached mapping.
+
+    Input:
+        sources (iterable): file paths or uploaded file objects (.csv, .xls, .xlsx)
+        max_workers (int): worker processes (defaults to one per part, capped at CPU count)
+        progress (callable): called as progress(done, total, part_label, rows)
+            after each sheet finishes
+
+    Returns:
+        pd.DataFrame: standardized rows of all parts, in workbook / sheet order
+    """
+    engine = excel_engine()
+    sources = list(sources)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = _materialize(sources, tmp_dir)
+        names = dict(zip(paths, map(source_name, sources)))
+        parts = list_parts(paths, engine)
+        labels = [names[path] + (f" [{sheet}]" if sheet is not None else "") for path, sheet in parts]
+
+        mappings = []
+        for (path, sheet), label in zip(parts, labels):
+            columns = _read_raw(path, sheet, nrows=0, engine=engine).columns
+            mapping = resolve_column_mapping(columns, verbose=verbose)
+            if mapping is None:
+                raise ValueError(f"Could not map Region / Week / Sales columns for {label}: {list(columns)}")
+            mappings.append(mapping)
+
+        results = [None] * len(parts)
+        if not parts:
+            return pd.DataFrame()
+        if len(parts) == 1:
+            results[0] = _read_part(*parts[0], engine, mappings[0])
+            if progress:
+                progress(1, 1, labels[0], len(results[0]))
+        else:
+            workers = min(max_workers or os.cpu_count() or 1, len(parts))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(_read_part, path, sheet, engine, mapping): i
+                    for i, ((path, sheet), mapping) in enumerate(zip(parts, mappings))
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    i = futures[future]
+                    results[i] = future.result()
+                    if progress:
+                        progress(done, len(parts), labels[i], len(results[i]))
+
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,21 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    Create the Ollama client on first use and reuse it afterwards.
+    dotenv and ollama are imported here instead of at module level, so code
+    paths that never call the LLM (e.g. batch metrics jobs) don't load them.
+    """
+    from dotenv import load_dotenv
+    from ollama import Client
+
+    load_dotenv()
+    api_key = os.getenv("OLLAMA_API_KEY")
+
+    return Client(
+        host="https://ollama.com",
+        headers={"Authorization": f"Bearer {api_key}"}
+    )
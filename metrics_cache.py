@@ -0,0 +1,236 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+from dynamic_metrics import metrics_from_aggregates, period_sales, weekly_region_aggregates
+
+
+# Part of every on-disk key; bump it whenever the metric or aggregate code changes
+# so results written by older code are never served
+CACHE_VERSION = 3
+
+
+def _atomic_write(path, write):
+    """Call write(tmp_path) and move the file into place, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def dataset_fingerprint(final_df: pd.DataFrame) -> str:
+    """
+    Content hash of a standardized dataset. Compute it once when the data is
+    loaded and pass it to `MetricsCache.get_metrics`, so the whole frame is
+    not re-hashed on every query.
+    """
+    row_hashes = pd.util.hash_pandas_object(final_df, index=False).to_numpy()
+    h = hashlib.sha1(row_hashes.tobytes())
+    h.update(",".join(map(str, final_df.columns)).encode())
+    return h.hexdigest()
+
+
+def _region_str(regions: pd.Series) -> pd.Series:
+    """Region labels as strings, leaving null Regions null (they count in totals, not in the top 3)."""
+    return regions.astype(str).where(regions.notna(), None)
+
+
+def _read_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _write_pickle(value, path):
+    with open(path, "wb") as f:
+        pickle.dump(value, f)
+
+
+class MetricsCache:
+    """
+    Result cache for `compute_retail_metrics`.
+
+    Two levels, both in memory and mirrored to `cache_dir` so they survive
+    process restarts:
+      - results keyed by (dataset fingerprint, start_date, end_date, region set)
+      - per dataset, the columnar (Week, Region) aggregate table (parquet)
+        plus monthly/quarterly/yearly totals per region set, reused for any
+        overlapping date range; only the partially covered edge periods of a
+        new range are re-summed from weekly totals.
+
+    In memory, the least recently used entries are dropped beyond
+    `max_entries` results and period-total sets and `max_datasets` aggregate
+    tables; on disk, beyond `max_disk_results` results and `max_disk_datasets`
+    aggregate tables. Files are written atomically and an unreadable file is
+    treated as a miss, so the cache can be shared by concurrent sessions.
+    """
+
+    def __init__(self, cache_dir=".metrics_cache", max_entries=512, max_datasets=8,
+                 max_disk_results=4096, max_disk_datasets=32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_datasets = max_datasets
+        self.max_disk_results = max_disk_results
+        self.max_disk_datasets = max_disk_datasets
+        self._results = OrderedDict()
+        self._aggregates = OrderedDict()  # dataset_key -> (aggregate table, {str label: label})
+        self._periods = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "results"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "aggregates"), exist_ok=True)
+
+    @staticmethod
+    def _result_key(dataset_key, start_date, end_date, regions):
+        region_part = "*" if regions is None else "|".join(sorted(map(str, regions)))
+        raw = f"v{CACHE_VERSION}:{dataset_key}:{pd.Timestamp(start_date).date()}:{pd.Timestamp(end_date).date()}:{region_part}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _aggregate_table(self, final_df, dataset_key):
+        """(aggregate table with string Regions, {string label: original label}) for the dataset."""
+        cached = self._lru_get(self._aggregates, dataset_key)
+        if cached is not None:
+            return cached
+
+        path = os.path.join(self.cache_dir, "aggregates", f"{dataset_key}.v{CACHE_VERSION}.parquet")
+        agg = self._load(path, pd.read_parquet)
+        if agg is None:
+            agg = weekly_region_aggregates(final_df)
+            # Region labels can be mixed types; store them as strings and map back below
+            stored = agg.assign(Region=_region_str(agg["Region"]))
+            self._store(path, lambda tmp: stored.to_parquet(tmp, index=False), self.max_disk_datasets)
+
+        agg = agg.assign(Region=_region_str(agg["Region"]))
+        labels = {}
+        if "Region" in final_df.columns:
+            labels = {str(r): r for r in final_df["Region"].dropna().unique()}
+        self._lru_put(self._aggregates, dataset_key, (agg, labels), self.max_datasets)
+        return agg, labels
+
+    def _period_totals(self, dataset_key, region_part, region_agg, start, end):
+        """Period sums for [start, end], reusing cached full periods."""
+        key = (dataset_key, region_part)
+        periods = self._lru_get(self._periods, key)
+        if periods is None:
+            weekly = region_agg.groupby("Week")["Sales"].sum()
+            periods = {freq: period_sales(weekly, freq) for freq in ("M", "Q", "Y")}
+            self._lru_put(self._periods, key, periods, self.max_entries)
+
+        in_range = region_agg[region_agg["Week"].between(start, end)]
+        weekly = in_range.groupby("Week")["Sales"].sum()
+        if weekly.empty:
+            return {}
+
+        totals = {}
+        for freq, cached in periods.items():
+            cached = cached.set_axis(cached.index.to_period(freq))
+            week_periods = weekly.index.to_period(freq)
+
+            # Periods entirely inside [start, end] sum the same weeks as the cached ones
+            full = (
+                (cached.index.start_time >= start)
+                & (cached.index.end_time.normalize() <= end)
+                & (cached.index >= week_periods.min())
+                & (cached.index <= week_periods.max())
+            )
+            reused = cached[full]
+
+            edge_weeks = weekly[~week_periods.isin(reused.index)]
+            edges = edge_weeks.groupby(edge_weeks.index.to_period(freq)).sum()
+            totals[freq] = pd.concat([reused, edges]).sort_index()
+        return totals
+
+    def get_metrics(self, final_df: pd.DataFrame, dataset_key: str, start_date, end_date, regions=None):
+        """
+        Return `compute_retail_metrics`-style (summary, top3_df) for the rows
+        of `final_df` with Week in [start_date, end_date] and, if given,
+        Region in `regions`.
+        """
+        key = self._result_key(dataset_key, start_date, end_date, regions)
+        result = self._lru_get(self._results, key)
+        if result is not None:
+            return result
+
+        path = os.path.join(self.cache_dir, "results", f"{key}.pkl")
+        result = self._load(path, _read_pickle)
+        if result is not None:
+            self._lru_put(self._results, key, result, self.max_entries)
+            return result
+
+        agg, region_labels = self._aggregate_table(final_df, dataset_key)
+
+        region_part = "*"
+        region_agg = agg
+        if regions is not None:
+            region_part = "|".join(sorted(map(str, regions)))
+            region_agg = agg[agg["Region"].isin([str(r) for r in regions])]
+
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        in_range = region_agg[region_agg["Week"].between(start, end)]
+        totals = self._period_totals(dataset_key, region_part, region_agg, start, end)
+
+        summary, top3_df = metrics_from_aggregates(in_range, totals)
+        if "Region" in final_df.columns:
+            top3_df["Region"] = top3_df["Region"].map(lambda r: region_labels.get(r, r))
+        else:
+            top3_df = top3_df.iloc[0:0]
+
+        result = (summary, top3_df)
+        self._store(path, lambda tmp: _write_pickle(result, tmp), self.max_disk_results)
+        self._lru_put(self._results, key, result, self.max_entries)
+        return result
+
+    @staticmethod
+    def _load(path, read):
+        """read(path), or None when the file is missing or unreadable (a miss)."""
+        if not os.path.exists(path):
+            return None
+        try:
+            value = read(path)
+        except Exception:
+            return None
+        # Reads count as use for the least-recently-used pruning
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    @staticmethod
+    def _store(path, write, max_files):
+        """Write `path` atomically, then drop the least recently used files in its directory beyond `max_files`."""
+        _atomic_write(path, write)
+
+        directory = os.path.dirname(path)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        for _, stale in sorted(files)[:max(len(files) - max_files, 0)]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    def _lru_get(self, store, key):
+        with self._lock:
+            if key not in store:
+                return None
+            store.move_to_end(key)
+            return store[key]
+
+    def _lru_put(self, store, key, value, max_size):
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > max_size:
+                store.popitem(last=False)
@@ -1,17 +1,8 @@
-from datetime import timedelta
 import pandas as pd
-from ollama import Client
-import os
-from dotenv import load_dotenv
 import re
-
-load_dotenv()
-api_key = os.getenv("OLLAMA_API_KEY")
-
-client = Client(
-    host="https://ollama.com",
-    headers={"Authorization": f"Bearer {api_key}"}
-)
+from comparisons import compare_regions, narrate_comparisons
+from driver_analysis import compute_driver_analysis, summarize_drivers
+from llm_client import get_client
 
 
 def generate_insights(final_df: pd.DataFrame):
@@ -35,20 +26,12 @@ def generate_insights(final_df: pd.DataFrame):
     cutoff_date = df["Week"].max() - pd.DateOffset(years=1)
     recent_data = df[df["Week"] >= cutoff_date]
 
-    latest_week = df["Week"].max()
-    previous_week = latest_week - timedelta(days=7)
-    quarter_start = latest_week - pd.DateOffset(months=3)
+    summary = recent_data.describe().to_string()
 
-    two_weeks_data = df[df["Week"].between(previous_week - timedelta(days=7), latest_week)]
-    quarter_data = df[df["Week"] >= quarter_start]
+    # Region comparisons are computed here; the LLM only phrases them
+    comparison_facts = narrate_comparisons(compare_regions(df))
 
-    summary = recent_data.describe().to_string()
-    quarter_summary = (
-        quarter_data.groupby("Region")["Sales"]
-        .sum()
-        .sort_values(ascending=False)
-        .to_string()
-    )
+    driver_table = summarize_drivers(*compute_driver_analysis(df))
 
     prompt = f"""
 You are acting as an experienced retail data analyst with access to two years of weekly sales data.
@@ -57,11 +40,14 @@ Use the data summaries below to generate analytical insights.
 Below is the summary of the most recent year’s sales data:
 {summary}
 
-Below is the summary of the most recent quarter's sales data:
-{quarter_summary}
+Below are precomputed, verified region comparisons (latest complete week / month / quarter / year
+versus the one before it, strongest movers first):
+{comparison_facts}
 
-Below is the summary of the most two week's sales data: 
-{two_weeks_data}
+Below is the precomputed correlation of week-over-week changes in sales with week-over-week changes
+in macro factors, plus holiday uplift (changes are used so shared long-term trends do not show up as
+correlation; Best Lag = weeks the factor leads sales; Strong Regions = regions with |corr| >= 0.5 and p < 0.05):
+{driver_table}
 
 Columns:
 - Region: store/region ID
@@ -77,7 +63,9 @@ Your task:
    - Example: “Region 3 showed a 10% increase in sales week-over-week.”
    - Short-term: Compare recent 2 weeks (e.g., “Region B’s revenue decreased by 12% week-over-week”)
    - Medium-term: Highlight best/worst performing regions in the last quarter (e.g., “Region D led the quarter with 15% growth”)
+   - For regional comparisons, restate facts from the precomputed region comparisons; do not compute new numbers.
    - Long-term: Note any multi-year trends, seasonality, or correlation with macro factors.
+     Use only the precomputed correlation table for macro factor claims; do not estimate correlations yourself.
    - **Important note:** Give *least priority* to unemployment rate analysis. 
      Only include unemployment-related insights if there is a *clear and significant* relationship with major sales fluctuations.
      If unemployment remains relatively stable or shows no correlation with sales, ignore it in the insights.
@@ -98,7 +86,7 @@ Output format (must be plain text):
 """
 
     response = ""
-    for part in client.chat("gpt-oss:20b", messages=[{"role": "user", "content": prompt}], stream=True):
+    for part in get_client().chat("gpt-oss:20b", messages=[{"role": "user", "content": prompt}], stream=True):
         response += part["message"]["content"]
         print(part["message"]["content"], end="", flush=True)
 
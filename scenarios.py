@@ -0,0 +1,207 @@
+import itertools
+import numpy as np
+import pandas as pd
+from driver_analysis import build_week_region_cube, masked_corr
+from dynamic_metrics import GROWTH_PERIODS
+
+
+# Macro factors a scenario can shift, as a relative change (0.15 = +15%)
+SCENARIO_FACTORS = ["temperature", "fuel_price", "cpi", "unemployment"]
+
+# Largest elasticity magnitude applied; a 10% factor change moves a region's sales by at most 10%
+ELASTICITY_LIMIT = 1.0
+
+ELASTICITY_COLUMNS = ["Factor", "Region", "Elasticity", "P-Value", "Source"]
+
+
+def build_scenario_grid(**params):
+    """
+    Cartesian product of scenario parameters, e.g.
+    build_scenario_grid(holiday_uplift=[0, 0.05, 0.10], fuel_price=[0, 0.15])
+    gives 6 scenarios, each named after its non-zero settings.
+    """
+    keys = list(params)
+    scenarios = []
+    for values in itertools.product(*(params[k] for k in keys)):
+        scenario = dict(zip(keys, values))
+        label = ", ".join(f"{k} {v:+.0%}" for k, v in scenario.items() if v)
+        scenario["name"] = label or "Baseline"
+        scenarios.append(scenario)
+    return scenarios
+
+
+def _log_slope(log_x: np.ndarray, log_y: np.ndarray) -> np.ndarray:
+    """OLS slope of log_y on log_x along the week axis (axis 1), ignoring NaN pairs."""
+    log_x, log_y = np.broadcast_arrays(log_x, log_y)
+    mask = ~(np.isnan(log_x) | np.isnan(log_y))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = mask.sum(axis=1)
+        mx = np.where(mask, log_x, 0).sum(axis=1) / n
+        my = np.where(mask, log_y, 0).sum(axis=1) / n
+        dx = np.where(mask, log_x - mx[:, None, :], 0)
+        dy = np.where(mask, log_y - my[:, None, :], 0)
+        return (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+
+
+def estimate_elasticities(sales: np.ndarray, cube: np.ndarray, alpha=0.05, limit=ELASTICITY_LIMIT):
+    """
+    Per-region elasticity of weekly Sales to each factor, for all factors and
+    regions at once.
+
+    Macro series trend over time, so a regression on levels picks up that
+    trend rather than a sales response. The slope is instead taken on
+    week-over-week log changes. A region keeps its own estimate only if the
+    correlation is significant (p < `alpha`, same test as driver_analysis).
+    Otherwise it gets the estimate pooled over all regions when that one is
+    significant, else 0. Estimates are clipped to ±`limit`.
+
+    Input:
+        sales (np.ndarray): (W, R) weekly sales
+        cube (np.ndarray): (F, W, R) factor values
+
+    Returns:
+        beta (np.ndarray): (F, R) elasticities
+        p_values (np.ndarray): (F, R) p-values of the per-region estimates
+        source (np.ndarray): (F, R) "region", "pooled" or "none"
+    """
+    n_factors, _, n_regions = cube.shape
+    if n_factors == 0 or sales.shape[0] < 4:
+        shape = (n_factors, n_regions)
+        return np.zeros(shape), np.full(shape, np.nan), np.full(shape, "none", dtype=object)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_x = np.log(np.where(cube > 0, cube, np.nan))
+        log_y = np.log(np.where(sales > 0, sales, np.nan))
+    change_x = np.diff(log_x, axis=1)              # (F, W-1, R)
+    change_y = np.diff(log_y, axis=0)              # (W-1, R)
+
+    beta = _log_slope(change_x, change_y[None])
+    _, p, _ = masked_corr(change_x, change_y)
+
+    # Pooled over regions: every (week, region) change as one observation
+    pooled_x = change_x.reshape(n_factors, -1, 1)
+    pooled_y = np.broadcast_to(change_y, change_x.shape[1:]).reshape(-1, 1)
+    pooled = _log_slope(pooled_x, pooled_y[None])[:, 0]
+    _, pooled_p, _ = masked_corr(pooled_x, pooled_y)
+    pooled_ok = np.isfinite(pooled) & (pooled_p[:, 0] < alpha)
+
+    own = np.isfinite(beta) & (p < alpha)
+    use_pooled = ~own & pooled_ok[:, None]
+    beta = np.where(own, beta, np.where(use_pooled, pooled[:, None], 0.0))
+    source = np.where(own, "region", np.where(use_pooled, "pooled", "none")).astype(object)
+    return np.clip(beta, -limit, limit), p, source
+
+
+def _growth(totals: np.ndarray) -> np.ndarray:
+    """Last column over the one before it, per scenario row."""
+    if totals.shape[1] < 2:
+        return np.full(totals.shape[0], np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (totals[:, -1] - totals[:, -2]) / totals[:, -2]
+
+
+def run_scenarios(final_df: pd.DataFrame, scenarios, elasticities=None) -> pd.DataFrame:
+    """
+    Re-compute the `compute_retail_metrics` KPIs under many what-if scenarios
+    in one batched evaluation.
+
+    Each scenario is a dict with optional keys:
+        name (str)
+        sales_change (float): relative change applied to every week
+        holiday_uplift (float): extra relative change on holiday weeks
+        temperature / fuel_price / cpi / unemployment (float): relative change
+            in the factor, translated into sales through per-region elasticities
+
+    All adjustments are multiplicative, so scenario weekly totals are
+    (S × R) effect matrices multiplied with the (R × W) sales and
+    holiday-sales matrices, and no scenario × week × region array is built.
+
+    Input:
+        final_df (pd.DataFrame): standardized DataFrame (already date/region filtered)
+        scenarios (list[dict]): scenarios to evaluate; a baseline is always added first
+        elasticities (dict): optional {factor: elasticity} overriding the estimates
+
+    Returns:
+        comparison (pd.DataFrame): one row per scenario with the KPIs and the
+            change in Total Sales versus the baseline; "Total Sales Δ %" is a
+            fraction like the growth columns (0.05 = +5%)
+        applied (pd.DataFrame): the elasticity used per factor and region, with
+            ELASTICITY_COLUMNS; Source is "region", "pooled", "none" or "given"
+    """
+    scenarios = [{"name": "Baseline"}] + [s for s in scenarios if s.get("name") != "Baseline"]
+
+    # Same rows as compute_retail_metrics: valid Week and Sales
+    df = final_df.copy()
+    df["Week"] = pd.to_datetime(df["Week"], errors="coerce")
+    df["Sales"] = pd.to_numeric(df["Sales"], errors="coerce")
+    df = df.dropna(subset=["Week", "Sales"])
+    n_rows = len(df)
+
+    kpi_cols = ["Scenario", "Total Sales", "Total Sales Δ %", "Avg Weekly Sales", "WoW Growth %"] + [
+        name for _, name, _ in GROWTH_PERIODS
+    ] + ["Anomaly Weeks", "Top Region"]
+    if n_rows == 0 or df["Region"].isna().all():
+        return pd.DataFrame(columns=kpi_cols), pd.DataFrame(columns=ELASTICITY_COLUMNS)
+
+    weeks, regions, sales, cube, factors = build_week_region_cube(df, SCENARIO_FACTORS + ["Holiday"])
+
+    macro = [f for f in factors if f != "Holiday"]
+    macro_cube = cube[[factors.index(f) for f in macro]] if macro else np.empty((0,) + sales.shape)
+    holiday = cube[factors.index("Holiday")] >= 0.5 if "Holiday" in factors else np.zeros(sales.shape, dtype=bool)
+
+    beta, p_values, source = estimate_elasticities(sales, macro_cube)
+    for i, f in enumerate(macro):
+        if elasticities and f in elasticities:
+            beta[i], p_values[i], source[i] = elasticities[f], np.nan, "given"
+
+    applied = pd.DataFrame({
+        "Factor": np.repeat(macro, len(regions)),
+        "Region": np.tile(regions.to_numpy(), len(macro)),
+        "Elasticity": beta.ravel(),
+        "P-Value": p_values.ravel(),
+        "Source": source.ravel(),
+    }, columns=ELASTICITY_COLUMNS)
+
+    # Scenario parameter arrays: (S,), (S,) and (S, F)
+    sales_change = np.array([s.get("sales_change", 0.0) for s in scenarios])
+    uplift = np.array([s.get("holiday_uplift", 0.0) for s in scenarios])
+    changes = np.array([[s.get(f, 0.0) for f in macro] for s in scenarios]).reshape(len(scenarios), len(macro))
+
+    # Factor effect per scenario and region: Π_f (1 + Δ_f) ** β_fr  -> (S, R)
+    effect = np.exp(np.log1p(changes) @ beta) * (1 + sales_change)[:, None]
+
+    base = np.nan_to_num(sales)
+    holiday_sales = base * holiday
+    weekly = effect @ base.T + uplift[:, None] * (effect @ holiday_sales.T)                       # (S, W)
+    region_totals = effect * (base.sum(axis=0) + uplift[:, None] * holiday_sales.sum(axis=0))    # (S, R)
+
+    total = weekly.sum(axis=1)
+    period_weeks = (weeks.max() - weeks.min()).days // 7
+
+    result = pd.DataFrame({
+        "Scenario": [s.get("name", f"Scenario {i}") for i, s in enumerate(scenarios)],
+        "Total Sales": total,
+        "Total Sales Δ %": total / total[0] - 1,
+        "Avg Weekly Sales": total / n_rows,
+        "WoW Growth %": _growth(weekly),
+    })
+
+    for freq, name, min_weeks in GROWTH_PERIODS:
+        if period_weeks < min_weeks:
+            result[name] = np.nan
+            continue
+        # One-hot week → period matrix over the full period range (empty periods sum to 0, as in resample)
+        ordinals = weeks.to_period(freq).asi8
+        codes = ordinals - ordinals.min()
+        onehot = np.zeros((len(weeks), codes.max() + 1))
+        onehot[np.arange(len(weeks)), codes] = 1
+        result[name] = _growth(weekly @ onehot)
+
+    std = weekly.std(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(std > 0, (weekly - weekly.mean(axis=1, keepdims=True)) / std, 0)
+    result["Anomaly Weeks"] = (np.abs(z) > 2).sum(axis=1)
+    result["Top Region"] = regions.to_numpy()[region_totals.argmax(axis=1)]
+
+    result["Total Sales"] = result["Total Sales"].round(2)
+    return result[kpi_cols], applied
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from driver_analysis import compute_driver_analysis, summarize_drivers
+
+
+def make_synthetic(n_regions: int, n_weeks: int = 143, seed: int = 0) -> pd.DataFrame:
+    """Walmart-shaped standardized data: one row per (Region, Week)."""
+    rng = np.random.default_rng(seed)
+    weeks = pd.date_range("2010-02-05", periods=n_weeks, freq="7D")
+
+    temperature = 60 + 20 * np.sin(np.arange(n_weeks) / 52 * 2 * np.pi)[:, None] + rng.normal(0, 5, (n_weeks, n_regions))
+    fuel_price = 3 + np.cumsum(rng.normal(0, 0.02, (n_weeks, n_regions)), axis=0)
+    cpi = 210 + np.cumsum(rng.normal(0.05, 0.1, (n_weeks, n_regions)), axis=0)
+    unemployment = 8 + rng.normal(0, 0.3, (n_weeks, n_regions))
+    holiday = np.zeros((n_weeks, n_regions), dtype=int)
+    holiday[::13] = 1
+    sales = (
+        1e6 * rng.uniform(0.5, 2.0, n_regions)
+        * (1 + 0.1 * holiday - 0.002 * (temperature - 60))
+        + rng.normal(0, 5e4, (n_weeks, n_regions))
+    )
+
+    return pd.DataFrame({
+        "Region": np.tile(np.arange(1, n_regions + 1), n_weeks),
+        "Week": np.repeat(weeks.strftime("%Y-%m-%d"), n_regions),
+        "Sales": sales.ravel(),
+        "Holiday": holiday.ravel(),
+        "temperature": temperature.ravel(),
+        "fuel_price": fuel_price.ravel(),
+        "cpi": cpi.ravel(),
+        "unemployment": unemployment.ravel(),
+    })
+
+
+if __name__ == "__main__":
+    for n_regions in [45, 500, 2000, 5000]:
+        df = make_synthetic(n_regions)
+
+        start = time.perf_counter()
+        global_df, region_df, uplift = compute_driver_analysis(df)
+        elapsed = time.perf_counter() - start
+        table = summarize_drivers(global_df, region_df, uplift)
+
+        print(
+            f"regions={n_regions:>5}  rows={len(df):>8,}  "
+            f"driver analysis={elapsed:6.3f}s  "
+            f"region results={len(region_df):>7,}  prompt table={len(table):>5} chars"
+        )
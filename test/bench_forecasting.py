@@ -0,0 +1,26 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_driver_analysis import make_synthetic
+from forecasting import FORECAST_MODELS, forecast_regions
+
+
+if __name__ == "__main__":
+    for n_regions in [45, 1000]:
+        df = make_synthetic(n_regions)
+
+        for model in FORECAST_MODELS:
+            cache = {}
+            for run in ["cold", "warm"]:
+                start = time.perf_counter()
+                forecast_df, stats = forecast_regions(df, horizon=13, model=model, cache=cache)
+                elapsed = time.perf_counter() - start
+
+                print(
+                    f"regions={n_regions:>5}  model={model:<15} {run}  total={elapsed:6.2f}s  "
+                    f"fitted={stats['fitted']:>5}  cached={stats['cached']:>5}  "
+                    f"fit={stats['fit_series_per_sec']:>9,.0f} series/s  "
+                    f"predict={stats['predict_series_per_sec']:>9,.0f} series/s"
+                )
@@ -0,0 +1,83 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PIPELINE_MODULES = ["dynamic_metrics", "metrics_cache", "data_preprocessing", "overall_analysis"]
+
+# A metrics-only worker must not pull these in at import time
+HEAVY_MODULES = ["matplotlib", "ollama", "dotenv", "streamlit", "scipy", "sklearn", "joblib"]
+
+METRICS_WORKER = "import dynamic_metrics, metrics_cache"
+
+
+def run_python(args):
+    return subprocess.run(
+        [sys.executable] + args, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def importtime_report(module: str, top: int = 8):
+    """
+    Parse `python -X importtime` into the module's cumulative import time and
+    its heaviest direct imports as (cumulative_ms, name) pairs.
+    """
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+
+    # Skip interpreter startup (everything up to and including `site`)
+    startup_end = max(i for i, (_, name) in enumerate(rows) if name == " site")
+    rows = rows[startup_end + 1:]
+
+    total = next(ms for ms, name in reversed(rows) if name.strip() == module)
+    direct = [(ms, name.strip()) for ms, name in rows if name.startswith("   ") and not name.startswith("    ")]
+    return total, sorted(direct, reverse=True)[:top]
+
+
+def cold_start_ms(code: str, repeat: int = 5):
+    """Median wall time of a fresh interpreter running `code`."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_python(["-c", code])
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time report for the pipeline modules.")
+    parser.add_argument("--budget-ms", type=float, default=800,
+                        help="cold-start budget for a metrics-only worker process")
+    args = parser.parse_args()
+
+    for module in PIPELINE_MODULES:
+        total, heaviest = importtime_report(module)
+        print(f"{module}: {total:,.0f} ms")
+        for ms, name in heaviest:
+            print(f"    {ms:8,.1f} ms  {name}")
+
+    loaded = run_python(["-c", f"{METRICS_WORKER}; import sys; print(' '.join(sys.modules))"]).stdout.split()
+    leaked = sorted({m.split(".")[0] for m in loaded} & set(HEAVY_MODULES))
+
+    baseline = cold_start_ms("pass")
+    worker = cold_start_ms(METRICS_WORKER)
+    print(f"\ninterpreter start: {baseline:,.0f} ms")
+    print(f"metrics-only worker cold start: {worker:,.0f} ms (budget {args.budget_ms:,.0f} ms)")
+
+    if leaked:
+        print(f"FAIL: metrics-only worker imports {leaked}")
+        sys.exit(1)
+    if worker > args.budget_ms:
+        print("FAIL: metrics-only worker cold start over budget")
+        sys.exit(1)
+    print("OK")